@@ -13,3 +13,9 @@ def on_todo(request, pk=None):
 @jd.URL('note/<int:pk>')
 def on_note(request, pk=None):
     return Note.on_rest_request(request, pk)
+
+
+@jd.URL('todo/async')
+@jd.URL('todo/async/<int:pk>')
+async def on_todo_async(request, pk=None):
+    return await TODO.on_rest_arequest(request, pk)
@@ -1,7 +1,8 @@
+import time
 from django.utils.deprecation import MiddlewareMixin
 from django.http import JsonResponse
 from authit.utils.jwtoken import JWToken
-from authit.models.user import User
+from authit.utils import usercache
 
 class JWTAuthenticationMiddleware(MiddlewareMixin):
     def process_request(self, request):
@@ -12,17 +13,36 @@ class JWTAuthenticationMiddleware(MiddlewareMixin):
         prefix, token = token.split()
         if prefix.lower() != 'bearer':
             return JsonResponse({'error': 'Invalid token prefix'}, status=401)
+        # tokens we already verified skip decoding entirely
+        verified = usercache.get_verified_token(token)
+        if verified is not None:
+            uid, exp, auth_key = verified
+            if exp and exp <= time.time():
+                return JsonResponse({'error': 'Token expired'}, status=401)
+            user = usercache.get_user(uid)
+            # a rotated auth_key falls through to a full verify against the new key
+            if user is not None and user.auth_key == auth_key:
+                request.user = user
+                return
         # decode data to find the user
         token_manager = JWToken()
         jwt_data = token_manager.decode(token, validate=False)
         if jwt_data.uid is None:
             return JsonResponse({'error': 'Invalid token data'}, status=401)
-        user = User.objects.filter(id=jwt_data.uid).last()
+        user = usercache.get_user(jwt_data.uid)
         if user is None:
             return JsonResponse({'error': 'Invalid token user'}, status=401)
         token_manager.key = user.auth_key
+        if not token_manager.is_token_valid(token) and not token_manager.is_expired:
+            # the cached user may predate an auth_key change made by another process
+            usercache.invalidate_user(user.id)
+            user = usercache.get_user(jwt_data.uid)
+            if user is None:
+                return JsonResponse({'error': 'Invalid token user'}, status=401)
+            token_manager.key = user.auth_key
         if not token_manager.is_token_valid(token):
             if token_manager.is_expired:
                 return JsonResponse({'error': 'Token expired'}, status=401)
             return JsonResponse({'error': 'Token has invalid signature'}, status=401)
+        usercache.set_verified_token(token, user.id, jwt_data.exp, user.auth_key)
         request.user = user
@@ -0,0 +1,33 @@
+# Generated by Django 5.2.18 on 2026-10-18 09:12
+
+from django.db import migrations, models
+
+
+def populate_group_paths(apps, schema_editor):
+    Group = apps.get_model("authit", "Group")
+    # walk the tree from the roots so every parent path is set before its children
+    level = list(Group.objects.filter(parent__isnull=True).values_list("id", flat=True))
+    paths = {pk: "/" for pk in level}
+    while level:
+        children = list(Group.objects.filter(parent_id__in=level).values_list("id", "parent_id"))
+        for pk, parent_id in children:
+            paths[pk] = f"{paths[parent_id]}{parent_id}/"
+        level = [pk for pk, _ in children]
+    groups = [Group(id=pk, path=path) for pk, path in paths.items() if path != "/"]
+    Group.objects.bulk_update(groups, ["path"], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('authit', '0006_alter_user_modified'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='group',
+            name='path',
+            field=models.TextField(db_index=True, default='/', editable=False),
+        ),
+        migrations.RunPython(populate_group_paths, migrations.RunPython.noop),
+    ]
@@ -1,5 +1,12 @@
-from django.db import models
+from django.db import models, transaction
+from django.db.models import Value
+from django.db.models.functions import Concat, Substr
 from jestit.models import JestitBase
+from jestit import errors as jerrors
+from jestit.helpers.settings import settings
+
+# members of a parent group get their membership in every descendant group
+GROUP_INHERIT_PERMS = settings.get("JESTIT_GROUP_INHERIT_PERMS", False)
 
 class Group(models.Model, JestitBase):
     """
@@ -14,6 +21,9 @@ class Group(models.Model, JestitBase):
 
     parent = models.ForeignKey("authit.Group", null=True, related_name="groups",
         default=None, on_delete=models.CASCADE)
+    # materialized ids of the ancestors, root first ie "/1/5/", maintained by save()
+    # unbounded so deep trees fit, postgres also gets a text_pattern_ops index for startswith
+    path = models.TextField(default="/", db_index=True, editable=False)
 
     # JSON-based metadata field
     metadata = models.JSONField(default=dict, blank=True)
@@ -55,16 +65,90 @@ class Group(models.Model, JestitBase):
     def __str__(self):
         return self.name
 
+    @property
+    def descendant_path(self):
+        """The path prefix shared by every descendant of this group."""
+        return f"{self.path}{self.id}/"
+
+    def get_ancestor_ids(self):
+        """Returns the ancestor ids, nearest parent first."""
+        return [int(pk) for pk in reversed(self.path.strip("/").split("/")) if pk]
+
+    @classmethod
+    def descendants_of(cls, group, include_self=False):
+        """Returns a queryset of every group below `group` in the tree."""
+        queryset = cls.objects.filter(path__startswith=group.descendant_path)
+        if include_self:
+            queryset = queryset | cls.objects.filter(id=group.id)
+        return queryset
+
+    @classmethod
+    def ancestors_of(cls, group, include_self=False):
+        """Returns a queryset of every group above `group` in the tree."""
+        ids = group.get_ancestor_ids()
+        if include_self:
+            ids.append(group.id)
+        return cls.objects.filter(id__in=ids)
+
+    def save(self, *args, **kwargs):
+        update_fields = kwargs.get("update_fields", None)
+        if update_fields is not None and "parent" not in update_fields:
+            return super().save(*args, **kwargs)
+        old_prefix = self.descendant_path if self.id else None
+        if self.parent_id is None:
+            path = "/"
+        else:
+            parent = self.parent
+            if self.id and (parent.id == self.id or parent.path.startswith(old_prefix)):
+                raise jerrors.RestErrorException("group cannot be moved below itself", 400, 400)
+            path = parent.descendant_path
+        moved = old_prefix is not None and path != self.path
+        self.path = path
+        if update_fields is not None:
+            kwargs["update_fields"] = list(update_fields) + ["path"]
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+            if moved:
+                # rewrite the subtree in one UPDATE
+                Group.objects.filter(path__startswith=old_prefix).update(
+                    path=Concat(Value(self.descendant_path), Substr("path", len(old_prefix) + 1)))
+
+    def get_member_for_user(self, user):
+        """
+        Returns the user's membership in this group or None.
+        Cached on the group instance (the request) and per process.
+        """
+        user_id = getattr(user, "id", None)
+        if user_id is None:
+            return None
+        members = self.__dict__.setdefault("_members", {})
+        if user_id not in members:
+            from authit.utils import membercache
+            members[user_id] = membercache.get_group_member(user_id, self.id)[1]
+        return members[user_id]
+
     def has_permission(self, user):
-        from authit.models.member import GroupMember
-        return GroupMember.objects.filter(user=user).last()
+        return self.get_member_for_user(user)
 
     def member_has_permission(self, user, perms):
-        ms = self.has_permission(user)
+        ms = self.get_member_for_user(user)
         if ms is None:
             return user.has_permission(perms)
         return ms.has_permission(perms)
 
+    @classmethod
+    def get_request_group(cls, request, group_id):
+        """
+        Returns the group for a group scoped request with the user's membership preloaded,
+        both read in one query and cached per process. None when the group does not exist.
+        """
+        from authit.utils import membercache
+        user_id = getattr(request.user, "id", None)
+        group, member = membercache.get_group_member(user_id, group_id)
+        if group is not None and user_id is not None:
+            group._members = {user_id: member}
+        return group
+
     @classmethod
     def on_rest_handle_list(cls, request):
         if cls.rest_check_permission(request, "VIEW_PERMS"):
@@ -1,6 +1,7 @@
 from django.db import models
 from jestit.models import JestitBase
 from jestit import errors as jerrors
+from jestit.helpers import perms as jperms
 from jestit.helpers.settings import settings
 
 MEMBER_PERMS_PROTECTION = settings.get("MEMBER_PERMS_PROTECTION", {})
@@ -68,28 +69,31 @@ class GroupMember(models.Model, JestitBase):
                 if not self.can_change_permission(perm, perm_value, request):
                     raise jerrors.PermissionDeniedException()
                 if bool(perm_value):
-                    self.add_permission(perm)
+                    self.add_permission(perm, commit=False)
                 else:
-                    self.remove_permission(perm)
+                    self.remove_permission(perm, commit=False)
+
+    @property
+    def permission_set(self):
+        """
+        The enabled permission keys of the JSON field. Not cached, the field may be
+        reassigned, edited in place or reloaded at any time.
+        """
+        return jperms.get_enabled_perms(self.permissions)
 
     def has_permission(self, perm_key):
-        """Check if user has a specific permission in JSON field."""
-        if isinstance(perm_key, list):
-            for pk in perm_key:
-                if self.has_permission(pk):
-                    return True
-            return False
-        if perm_key == "all":
-            return True
-        return self.permissions.get(perm_key, False)
+        """Check if user has a specific permission (or any of a list) in JSON field."""
+        return jperms.has_enabled(self.permissions, perm_key)
 
-    def add_permission(self, perm_key, value=True):
+    def add_permission(self, perm_key, value=True, commit=True):
         """Dynamically add a permission."""
         self.permissions[perm_key] = value
-        self.save()
+        if commit:
+            self.save()
 
-    def remove_permission(self, perm_key):
+    def remove_permission(self, perm_key, commit=True):
         """Remove a permission."""
         if perm_key in self.permissions:
             del self.permissions[perm_key]
-            self.save()
+            if commit:
+                self.save()
@@ -3,7 +3,8 @@ from django.db import models
 from jestit.models import JestitBase
 from jestit.helpers.settings import settings
 from jestit import errors as jerrors
-import datetime
+from jestit.helpers import perms as jperms
+from authit.utils import activity
 import uuid
 
 USER_PERMS_PROTECTION = settings.get("USER_PERMS_PROTECTION", {})
@@ -13,7 +14,7 @@ class User(AbstractBaseUser, JestitBase):
     Full custom user model.
     """
     created = models.DateTimeField(auto_now_add=True, editable=False)
-    modified = models.DateTimeField(auto_now_add=True, editable=True)
+    modified = models.DateTimeField(auto_now=True, db_index=True)
     last_activity = models.DateTimeField(default=None, null=True, db_index=True)
 
     username = models.TextField(unique=True)
@@ -75,9 +76,11 @@ class User(AbstractBaseUser, JestitBase):
             return False
         return request.user.id == self.id
 
-    def touch(self):
-        self.last_activity = datetime.datetime.utcnow()
-        self.atomic_save()
+    def touch(self, field="last_activity", force=False):
+        """
+        Bumps a timestamp field, the write is buffered and coalesced with other users.
+        """
+        activity.get_recorder(User).record(self, field, force=force)
 
     def get_auth_key(self):
         if self.auth_key is None:
@@ -95,31 +98,34 @@ class User(AbstractBaseUser, JestitBase):
             elif not request.user.has_permission("manage_users"):
                 raise jerrors.PermissionDeniedException()
             if bool(value[key]):
-                self.add_permission(key)
+                self.add_permission(key, commit=False)
             else:
-                self.remove_permission(key)
+                self.remove_permission(key, commit=False)
+
+    @property
+    def permission_set(self):
+        """
+        The enabled permission keys of the JSON field. Not cached, the field may be
+        reassigned, edited in place or reloaded at any time.
+        """
+        return jperms.get_enabled_perms(self.permissions)
 
     def has_permission(self, perm_key):
-        """Check if user has a specific permission in JSON field."""
-        if isinstance(perm_key, list):
-            for pk in perm_key:
-                if self.has_permission(pk):
-                    return True
-            return False
-        if perm_key == "all":
-            return True
-        return self.permissions.get(perm_key, False)
+        """Check if user has a specific permission (or any of a list) in JSON field."""
+        return jperms.has_enabled(self.permissions, perm_key)
 
-    def add_permission(self, perm_key, value=True):
+    def add_permission(self, perm_key, value=True, commit=True):
         """Dynamically add a permission."""
         self.permissions[perm_key] = value
-        self.save()
+        if commit:
+            self.save()
 
-    def remove_permission(self, perm_key):
+    def remove_permission(self, perm_key, commit=True):
         """Remove a permission."""
         if perm_key in self.permissions:
             del self.permissions[perm_key]
-            self.save()
+            if commit:
+                self.save()
 
     def save(self, *args, **kwargs):
         if not self.username:
@@ -2,7 +2,6 @@ from jestit import decorators as jd
 from authit.utils.jwtoken import JWToken
 from django.http import JsonResponse
 from authit.models.user import User
-import datetime
 
 @jd.URL('user')
 @jd.URL('user/<int:pk>')
@@ -21,7 +20,6 @@ def on_user_login(request):
     if not user.check_password(password):
         # Authentication successful
         return JsonResponse(dict(status=False, error="Invalid username or password", code=401))
-    user.last_login = datetime.datetime.utcnow()
-    user.save()
+    user.touch("last_login", force=True)
     token_package = JWToken(user.get_auth_key()).create(uid=user.id)
     return JsonResponse(dict(status=True, data=token_package))
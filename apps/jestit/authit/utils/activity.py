@@ -0,0 +1,166 @@
+import os
+import atexit
+import threading
+from django.db import connections
+from django.db.models import Case, When, Value, DateTimeField
+from django.utils import timezone
+from jestit.helpers.settings import settings
+from jestit.helpers import logit
+
+logger = logit.get_logger("activity", "activity.log")
+
+# seconds between flushes, 0 writes every recorded timestamp immediately
+FLUSH_INTERVAL = settings.get("JESTIT_ACTIVITY_FLUSH_INTERVAL", 30)
+# seconds a user timestamp is not re-recorded after being recorded
+SKIP_WINDOW = settings.get("JESTIT_ACTIVITY_SKIP_WINDOW", 60)
+BATCH_SIZE = settings.get("JESTIT_ACTIVITY_BATCH_SIZE", 500)
+
+
+class ActivityRecorder:
+    """
+    Buffers user timestamp bumps (last_activity, last_login) in memory and writes them
+    with one UPDATE per field every `interval` seconds from a background thread.
+    """
+
+    def __init__(self, model, interval=FLUSH_INTERVAL, window=SKIP_WINDOW):
+        """
+        :param model: The model whose timestamp columns are updated.
+        :param interval: Seconds between flushes, 0 writes synchronously.
+        :param window: Seconds during which repeat timestamps for a user are skipped.
+        """
+        self.model = model
+        self.interval = interval
+        self.window = window
+        # {field: {pk: timestamp}}
+        self.pending = {}
+        # {(field, pk): timestamp} of the last recorded bump, used for the skip window
+        self.recorded = {}
+        self.lock = threading.Lock()
+        self.wakeup = threading.Event()
+        self.thread = None
+
+    def record(self, instance, field="last_activity", when=None, force=False):
+        """
+        Sets the timestamp on the instance and queues it for the next flush.
+        Returns False when it was skipped because of the skip window.
+        """
+        when = timezone.now() if when is None else when
+        key = (field, instance.pk)
+        with self.lock:
+            last = self.recorded.get(key)
+            if not force and last is not None and (when - last).total_seconds() < self.window:
+                return False
+            self.recorded[key] = when
+            self.pending.setdefault(field, {})[instance.pk] = when
+        setattr(instance, field, when)
+        if not self.interval:
+            self.flush()
+        else:
+            self.start()
+        return True
+
+    def start(self):
+        if self.thread is not None:
+            return
+        with self.lock:
+            if self.thread is not None:
+                return
+            self.thread = threading.Thread(target=self.run, name="activity_recorder", daemon=True)
+            self.thread.start()
+
+    def run(self):
+        while not self.wakeup.wait(self.interval):
+            try:
+                self.flush()
+            except Exception as err:
+                logger.exception(err)
+            finally:
+                connections.close_all()
+
+    def flush(self):
+        """
+        Writes all pending timestamps, one UPDATE per field and batch.
+        """
+        with self.lock:
+            pending, self.pending = self.pending, {}
+            self.prune()
+        try:
+            for field, stamps in pending.items():
+                pks = list(stamps.keys())
+                for start in range(0, len(pks), BATCH_SIZE):
+                    batch = pks[start:start + BATCH_SIZE]
+                    self.write(field, {pk: stamps[pk] for pk in batch})
+                    for pk in batch:
+                        del stamps[pk]
+        except Exception:
+            # anything not written goes back for the next flush
+            self.requeue(pending)
+            raise
+
+    def write(self, field, stamps):
+        """Sets `field` to the timestamp of each pk in `stamps`, in a single UPDATE."""
+        value = Case(*[When(pk=pk, then=Value(when)) for pk, when in stamps.items()],
+                     output_field=DateTimeField())
+        self.model.objects.filter(pk__in=list(stamps)).update(**{field: value})
+
+    def requeue(self, pending):
+        """
+        Merges unwritten timestamps back into the pending ones, keeping the newer per user.
+        """
+        with self.lock:
+            for field, stamps in pending.items():
+                current = self.pending.setdefault(field, {})
+                for pk, when in stamps.items():
+                    if pk not in current or current[pk] < when:
+                        current[pk] = when
+
+    def prune(self):
+        # drop skip window entries that have expired, called with the lock held
+        if len(self.recorded) < 10000:
+            return
+        now = timezone.now()
+        self.recorded = {key: when for key, when in self.recorded.items()
+                         if (now - when).total_seconds() < self.window}
+
+    def stop(self):
+        """
+        Stops the flush thread and writes anything still pending.
+        """
+        self.wakeup.set()
+        try:
+            self.flush()
+        except Exception as err:
+            logger.exception(err)
+
+    def reset(self):
+        # forked children start empty, the parent writes what it has pending
+        self.pending = {}
+        self.recorded = {}
+        self.lock = threading.Lock()
+        self.wakeup = threading.Event()
+        self.thread = None
+
+
+RECORDERS = {}
+
+
+def get_recorder(model):
+    recorder = RECORDERS.get(model)
+    if recorder is None:
+        recorder = RECORDERS.setdefault(model, ActivityRecorder(model))
+    return recorder
+
+
+@atexit.register
+def flush_all():
+    for recorder in list(RECORDERS.values()):
+        recorder.stop()
+
+
+def reset_all():
+    for recorder in RECORDERS.values():
+        recorder.reset()
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=reset_all)
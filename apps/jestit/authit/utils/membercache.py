@@ -0,0 +1,88 @@
+import copy
+from django.db.models import F, Q, FilteredRelation
+from django.db.models.signals import post_save, post_delete
+from jestit.helpers.cache import LRUCache
+from jestit.helpers.settings import settings
+from authit.models.group import Group, GROUP_INHERIT_PERMS
+from authit.models.member import GroupMember
+
+# {(user_id, group_id): (group, member or None)}
+MEMBER_CACHE = LRUCache(
+    settings.get("JESTIT_MEMBER_CACHE_SIZE", 10000),
+    ttl=settings.get("JESTIT_MEMBER_CACHE_TTL", 60))
+MEMBER_FIELDS = [field.attname for field in GroupMember._meta.concrete_fields]
+
+
+def get_group_member(user_id, group_id):
+    """
+    Returns private copies of (group, member) for a user and group, member is None
+    when the user does not belong to the group and group is None when it does not exist.
+    """
+    key = (user_id, group_id)
+    entry = MEMBER_CACHE.get(key)
+    if entry is None:
+        entry = load_group_member(user_id, group_id)
+        if entry[0] is None:
+            return None, None
+        MEMBER_CACHE.set(key, entry)
+    # callers may mutate the instances, never hand out the shared ones
+    return copy.deepcopy(entry)
+
+
+def load_group_member(user_id, group_id):
+    """
+    Loads the group and the user's membership with a single LEFT JOIN.
+    """
+    annotations = {f"_member_{name}": F(f"membership__{name}") for name in MEMBER_FIELDS}
+    queryset = Group.objects.filter(id=group_id).annotate(
+        membership=FilteredRelation("members", condition=Q(members__user_id=user_id)),
+        **annotations)
+    group = next(iter(queryset[:1]), None)
+    if group is None:
+        return None, None
+    values = [group.__dict__.pop(f"_member_{name}") for name in MEMBER_FIELDS]
+    member = None
+    if values[MEMBER_FIELDS.index("id")] is not None:
+        member = GroupMember.from_db(queryset.db, MEMBER_FIELDS, values)
+        # the group is already loaded, avoid a query when member.group is read
+        member.group = group
+    elif GROUP_INHERIT_PERMS and user_id is not None and group.parent_id is not None:
+        member = load_inherited_member(user_id, group)
+    return group, member
+
+
+def load_inherited_member(user_id, group):
+    """
+    Returns the user's membership in the nearest ancestor group, resolved in one query
+    from the group path, or None.
+    """
+    ancestor_ids = group.get_ancestor_ids()
+    members = {member.group_id: member for member in GroupMember.objects.filter(
+        user_id=user_id, group_id__in=ancestor_ids).select_related("group")}
+    for group_id in ancestor_ids:
+        if group_id in members:
+            return members[group_id]
+    return None
+
+
+def invalidate_member(user_id, group_id):
+    MEMBER_CACHE.delete((user_id, group_id))
+
+
+def on_member_changed(sender, instance, **kwargs):
+    if GROUP_INHERIT_PERMS:
+        # the membership may be inherited by any descendant group
+        MEMBER_CACHE.clear()
+    else:
+        invalidate_member(instance.user_id, instance.group_id)
+
+
+def on_group_changed(sender, instance, **kwargs):
+    # group edits are rare, drop every cached membership instead of indexing by group
+    MEMBER_CACHE.clear()
+
+
+post_save.connect(on_member_changed, sender=GroupMember, dispatch_uid="authit_member_cache")
+post_delete.connect(on_member_changed, sender=GroupMember, dispatch_uid="authit_member_cache")
+post_save.connect(on_group_changed, sender=Group, dispatch_uid="authit_member_cache")
+post_delete.connect(on_group_changed, sender=Group, dispatch_uid="authit_member_cache")
@@ -0,0 +1,62 @@
+import copy
+import time
+from django.db.models.signals import post_save, post_delete
+from jestit.helpers.cache import LRUCache
+from jestit.helpers.settings import settings
+from authit.models.user import User
+
+# verified tokens keyed by their signature segment, {signature: (uid, exp, auth_key)}
+TOKEN_CACHE = LRUCache(settings.get("JESTIT_AUTH_TOKEN_CACHE_SIZE", 20000))
+# users loaded for authentication. A cached token is only accepted while the cached user
+# still has the auth_key it was verified with, so rotating auth_key revokes tokens at once
+# in the process that saved the user and within this TTL in every other process.
+USER_CACHE = LRUCache(
+    settings.get("JESTIT_AUTH_USER_CACHE_SIZE", 5000),
+    ttl=settings.get("JESTIT_AUTH_USER_CACHE_TTL", 10))
+
+
+def get_user(uid):
+    """
+    Returns a private copy of the user for `uid`, loading it on a cache miss.
+    Returns None when the user does not exist.
+    """
+    user = USER_CACHE.get(uid)
+    if user is None:
+        try:
+            user = User.objects.get(id=uid)
+        except (User.DoesNotExist, ValueError, TypeError):
+            return None
+        USER_CACHE.set(uid, user)
+    # requests may mutate request.user, never hand out the shared instance
+    return copy.deepcopy(user)
+
+
+def get_token_signature(token):
+    # the signature covers the header and payload, the cached uid is the one it was verified for
+    return token.rpartition(".")[2]
+
+
+def get_verified_token(token):
+    """
+    Returns (uid, exp, auth_key) for a token that was already verified, None otherwise.
+    """
+    return TOKEN_CACHE.get(get_token_signature(token))
+
+
+def set_verified_token(token, uid, exp, auth_key):
+    ttl = exp - time.time() if exp else None
+    if ttl is None or ttl > 0:
+        TOKEN_CACHE.set(get_token_signature(token), (uid, exp, auth_key), ttl=ttl)
+
+
+def invalidate_user(uid):
+    USER_CACHE.delete(uid)
+
+
+def on_user_changed(sender, instance, **kwargs):
+    # saves can change auth_key, permissions or is_active
+    invalidate_user(instance.pk)
+
+
+post_save.connect(on_user_changed, sender=User, dispatch_uid="authit_user_cache")
+post_delete.connect(on_user_changed, sender=User, dispatch_uid="authit_user_cache")
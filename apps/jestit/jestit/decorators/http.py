@@ -1,15 +1,25 @@
 import sys
+import copy
 import traceback
-from jestit.models import base
+import ujson
+from objict import objict
 from jestit.helpers.settings import settings
 from jestit.helpers import modules as jm
 from jestit.helpers import logit
 import jestit.errors
-from django.urls import path, re_path
-from django.http import JsonResponse
+from django import db
+from django.urls import resolve, Resolver404, URLPattern
+from django.urls.resolvers import RegexPattern
+from django.http import JsonResponse, QueryDict
+from django.utils.datastructures import MultiValueDict
+from django.utils.functional import LazyObject, empty
+from asgiref.sync import async_to_sync, sync_to_async, iscoroutinefunction
 from functools import wraps
-from jestit.helpers.request import parse_request_data
+from jestit.helpers.request import parse_request_data, lazy_request_data, BULK_KEY
 from jestit.helpers import modules
+from jestit.helpers.context import ContextThreadPoolExecutor
+from jestit.helpers import context
+from jestit.helpers.router import Router
 
 logger = logit.get_logger("jestit", "jestit.log")
 logger.info("created")
@@ -17,44 +27,311 @@ logger.info("created")
 # Global registry for REST routes
 REGISTERED_URLS = {}
 URLPATTERN_METHODS = {}
+# registered views wrapped in dispatch_error_handler once, keyed like URLPATTERN_METHODS
+URLPATTERN_HANDLERS = {}
+# {app module name: Router}
+ROUTERS = {}
 JESTIT_API_MODULE = settings.get("JESTIT_API_MODULE", "api")
 JESTIT_APPEND_SLASH = settings.get("JESTIT_APPEND_SLASH", False)
+JESTIT_BATCH_MAX = settings.get("JESTIT_BATCH_MAX", 50)
+JESTIT_BATCH_WORKERS = settings.get("JESTIT_BATCH_WORKERS", 4)
 
 
 def dispatcher(request, *args, **kwargs):
     """
     Dispatches incoming requests to the appropriate registered URL method.
     """
-    base.ACTIVE_REQUEST = request
     key = kwargs.pop('__jestit_key__', None)
+    request.DATA = lazy_request_data(request)
+    return dispatch_request(request, key, *args, **kwargs)
+
+
+def router_dispatcher(request, __jestit_path__="", __jestit_router__=None):
+    """
+    The single Django view of an app, resolves the path and method with the app router.
+    """
+    match = __jestit_router__.resolve(request.method, __jestit_path__)
+    if match is None:
+        return JsonResponse({"error": "Endpoint not found", "code": 404}, status=404)
+    key, handler, kwargs = match
+    request.DATA = lazy_request_data(request)
+    return dispatch_request(request, key, handler=handler, **kwargs)
+
+
+async def arouter_dispatcher(request, __jestit_path__="", __jestit_router__=None):
+    """
+    `router_dispatcher` for paths with coroutine handlers, resolved by `RouterURLPattern`
+    so ASGI servers await the handler in the event loop instead of a worker thread.
+    """
+    match = __jestit_router__.resolve(request.method, __jestit_path__)
+    if match is None:
+        return JsonResponse({"error": "Endpoint not found", "code": 404}, status=404)
+    key, handler, kwargs = match
+    request.DATA = lazy_request_data(request)
+    return await adispatch_request(request, key, handler=handler, **kwargs)
+
+
+class RouterURLPattern(URLPattern):
+    """
+    The catch-all url pattern of an app router, resolves to `arouter_dispatcher` when
+    the path has a coroutine handler, so Django runs it natively under ASGI.
+    """
+
+    def __init__(self, router):
+        super().__init__(
+            RegexPattern(r"^(?P<__jestit_path__>.*)$", is_endpoint=True),
+            router_dispatcher, {"__jestit_router__": router})
+        self.router = router
+
+    def resolve(self, path):
+        match = super().resolve(path)
+        if match is not None and self.router.is_async(match.kwargs["__jestit_path__"]):
+            match.func = arouter_dispatcher
+        return match
+
+
+def resolve_route(path, method):
+    """
+    Returns (key, handler, args, kwargs) for an absolute path, or None when it is not a jestit route.
+    """
+    try:
+        match = resolve(path)
+    except Resolver404:
+        return None
+    kwargs = dict(match.kwargs)
+    if match.func is router_dispatcher or match.func is arouter_dispatcher:
+        found = kwargs["__jestit_router__"].resolve(method, kwargs["__jestit_path__"])
+        if found is None:
+            return None
+        return found[0], found[1], (), found[2]
+    if match.func is dispatcher:
+        key = kwargs.pop('__jestit_key__', None)
+        return key, None, match.args, kwargs
+    return None
+
+
+def dispatch_request(request, key, *args, handler=None, **kwargs):
+    """
+    Runs the registered URL method for `key` against a request with `DATA` already parsed.
+    """
+    token = context.set_request(request)
+    try:
+        return _dispatch_request(request, key, *args, handler=handler, **kwargs)
+    finally:
+        context.reset_request(token)
+
+
+def _dispatch_request(request, key, *args, handler=None, **kwargs):
+    set_timer_key(request, key)
+    try:
+        group = get_request_group_id(request)
+    except jestit.errors.JestitException as err:
+        return dispatch_error_response(request, err)
+    if group is not None:
+        request.group = modules.get_model("authit", "Group").get_request_group(request, group)
+    logger.info(request.method, request.path)
+    handler = get_handler(key, handler)
+    if handler is None:
+        return JsonResponse({"error": "Endpoint not found", "code": 404}, status=404)
+    if iscoroutinefunction(handler):
+        # batch sub-requests and the legacy dispatcher call coroutine views from sync code
+        return async_to_sync(handler)(request, *args, **kwargs)
+    return handler(request, *args, **kwargs)
+
+
+async def adispatch_request(request, key, *args, handler=None, **kwargs):
+    """
+    Async `dispatch_request`, awaits coroutine handlers and runs sync ones in a worker thread.
+    """
+    token = context.set_request(request)
+    try:
+        user = getattr(request, "user", None)
+        set_timer_key(request, key)
+        if isinstance(user, LazyObject) and user._wrapped is empty:
+            # the session user is loaded on first access, which queries
+            await sync_to_async(user._setup)()
+        try:
+            group = get_request_group_id(request)
+        except jestit.errors.JestitException as err:
+            return dispatch_error_response(request, err)
+        if group is not None:
+            request.group = await sync_to_async(
+                modules.get_model("authit", "Group").get_request_group)(request, group)
+        logger.info(request.method, request.path)
+        handler = get_handler(key, handler)
+        if handler is None:
+            return JsonResponse({"error": "Endpoint not found", "code": 404}, status=404)
+        if iscoroutinefunction(handler):
+            return await handler(request, *args, **kwargs)
+        return await sync_to_async(handler)(request, *args, **kwargs)
+    finally:
+        context.reset_request(token)
+
+
+def set_timer_key(request, key):
+    # the timing middleware aggregates per registered route
+    timer = getattr(request, "timer", None)
+    if timer is not None and key is not None:
+        timer.key = key
+
+
+def get_request_group_id(request):
+    """Returns the int group id of a group scoped request or None, raises a 400 when it is not an id."""
+    # GET data is only the query string, read it without building request.DATA
+    if request.method == "GET":
+        group = request.GET.get("group", None)
+    else:
+        group = request.DATA.get("group", None)
+    if group is None:
+        return None
+    try:
+        return int(group)
+    except (TypeError, ValueError):
+        raise jestit.errors.RestErrorException(f"invalid group: {group}", 400, 400)
+
+
+def get_handler(key, handler=None):
+    if handler is None:
+        handler = URLPATTERN_HANDLERS.get(key, None)
+    if handler is None and key in URLPATTERN_METHODS:
+        handler = dispatch_error_handler(URLPATTERN_METHODS[key])
+    return handler
+
+
+def batch_dispatcher(request):
+    """
+    Runs a list of sub-requests inside a single request.
+
+    The body is `{"requests": [{"method": "GET", "path": "/api/authit/user/1", "data": {}}, ...]}`
+    (or just the list). Authentication runs once for the outer request and every
+    sub-request shares its user. With `"parallel": true` and only GET sub-requests
+    they run on a thread pool, otherwise they run in order.
+    Returns `{"status": true, "data": [{"status": 200, "data": {...}}, ...]}`.
+    """
+    if request.method != "POST":
+        return JsonResponse({"error": "batch requires POST", "code": 405}, status=405)
     request.DATA = parse_request_data(request)
-    if "group" in request.DATA:
-        request.group = modules.get_model_instance("authit", "Group", int(request.DATA.group))
-    logger.info(request.DATA)
-    if key in URLPATTERN_METHODS:
-        return dispatch_error_handler(URLPATTERN_METHODS[key])(request, *args, **kwargs)
-    return JsonResponse({"error": "Endpoint not found", "code": 404}, status=404)
+    items = request.DATA.get("requests", request.DATA.get(BULK_KEY, None))
+    if not isinstance(items, list):
+        return JsonResponse({"error": "batch requires a list of requests", "code": 400}, status=400)
+    if len(items) > JESTIT_BATCH_MAX:
+        return JsonResponse({"error": f"batch is limited to {JESTIT_BATCH_MAX} requests", "code": 400}, status=400)
+
+    read_only = all(isinstance(item, dict) and str(item.get("method", "GET")).upper() == "GET" for item in items)
+    if read_only and len(items) > 1 and request.DATA.get_typed("parallel", False, bool):
+        used = []
+        with ContextThreadPoolExecutor(max_workers=min(len(items), JESTIT_BATCH_WORKERS)) as executor:
+            results = list(executor.map(lambda item: _run_batch_thread(request, item, used), items))
+        close_thread_connections(used)
+    else:
+        results = [_run_batch_item(request, item) for item in items]
+    return JsonResponse({"status": True, "data": results})
+
+
+def _run_batch_thread(request, item, used):
+    try:
+        return _run_batch_item(request, item)
+    finally:
+        # worker threads open their own db connections, closed once the pool is done
+        for conn in db.connections.all(initialized_only=True):
+            if conn not in used:
+                used.append(conn)
+
+
+def close_thread_connections(conns):
+    """Closes connections opened by (finished) worker threads from the current thread."""
+    for conn in conns:
+        conn.inc_thread_sharing()
+        try:
+            conn.close()
+        finally:
+            conn.dec_thread_sharing()
+
+
+def _run_batch_item(request, item):
+    if not isinstance(item, dict) or not item.get("path"):
+        return {"status": 400, "data": {"error": "invalid batch request", "code": 400}}
+    method = str(item.get("method", "GET")).upper()
+    path, _, query = str(item["path"]).partition("?")
+    if not path.startswith("/"):
+        path = f"/{path}"
+    try:
+        response = _dispatch_batch_item(request, item, method, path, query)
+    except Exception as err:
+        # one failing sub-request never fails the batch
+        response = dispatch_error_response(request, err)
+    if response.streaming:
+        content = b"".join(response.streaming_content)
+    else:
+        content = response.content
+    try:
+        payload = ujson.loads(content) if content else None
+    except ValueError:
+        payload = content.decode("utf-8")
+    return {"status": response.status_code, "data": payload}
+
+
+def _dispatch_batch_item(request, item, method, path, query):
+    route = resolve_route(path, method)
+    if route is None:
+        return JsonResponse({"error": "Endpoint not found", "code": 404}, status=404)
+    key, handler, args, kwargs = route
+
+    data = objict.fromdict(QueryDict(query).dict())
+    if isinstance(item.get("data", None), dict):
+        data.update(objict.fromdict(item["data"]))
+    sub_request = copy.copy(request)
+    sub_request.method = method
+    sub_request.path = sub_request.path_info = path
+    sub_request.META = dict(request.META, REQUEST_METHOD=method, QUERY_STRING=query)
+    sub_request.GET = QueryDict(mutable=True)
+    if method == "GET":
+        sub_request.GET.update({key: value for key, value in data.items() if not isinstance(value, (dict, list))})
+    # sub-requests never carry form posts or uploads of their own
+    sub_request._post = QueryDict()
+    sub_request._files = MultiValueDict()
+    sub_request.group = None
+    # sub-requests are timed as part of the batch
+    sub_request.timer = None
+    sub_request.DATA = data
+    return dispatch_request(sub_request, key, *args, handler=handler, **kwargs)
 
 
 def dispatch_error_handler(func):
     """
     Decorator to catch and handle errors.
     It logs exceptions and returns appropriate HTTP responses.
+    Coroutine functions get a coroutine wrapper.
     """
+    if iscoroutinefunction(func):
+        @wraps(func)
+        async def async_wrapper(request, *args, **kwargs):
+            try:
+                return await func(request, *args, **kwargs)
+            except Exception as err:
+                return dispatch_error_response(request, err)
+
+        return async_wrapper
+
     @wraps(func)
     def wrapper(request, *args, **kwargs):
         try:
             return func(request, *args, **kwargs)
-        except jestit.errors.JestitException as err:
-            return JsonResponse({"error": err.reason, "code": err.code}, status=err.status)
         except Exception as err:
-            logger.exception(f"Unhandled REST Exception: {request.path}")
-            stack_trace = traceback.format_exc()
-            return JsonResponse({"error": str(err), "stack": stack_trace}, status=500)
+            return dispatch_error_response(request, err)
 
     return wrapper
 
 
+def dispatch_error_response(request, err):
+    """Returns the error response for an exception raised by a view, call it from the except block."""
+    if isinstance(err, jestit.errors.JestitException):
+        return JsonResponse({"error": err.reason, "code": err.code}, status=err.status)
+    logger.exception(f"Unhandled REST Exception: {request.path}")
+    stack_trace = traceback.format_exc()
+    return JsonResponse({"error": str(err), "stack": stack_trace}, status=500)
+
+
 def _register_route(method="ALL"):
     """
     Decorator to automatically register a Django view for a specific HTTP method.
@@ -88,16 +365,15 @@ def _register_route(method="ALL"):
             key = f"{module.__name__}__{pattern_used}__{method}"
             print(key)
             URLPATTERN_METHODS[key] = view_func
+            URLPATTERN_HANDLERS[key] = dispatch_error_handler(view_func)
 
-            # Determine whether to use path() or re_path()
-            url_func = path if not (pattern_used.startswith("^") or pattern_used.endswith("$")) else re_path
-
-            # Add to `urlpatterns`
-            module.urlpatterns.append(url_func(
-                pattern_used, dispatcher,
-                kwargs={
-                    "__jestit_key__": key
-                }))
+            # every route of the app resolves through one router and one url pattern
+            router = ROUTERS.get(app_name, None)
+            if router is None:
+                router = Router(app_name)
+                ROUTERS[app_name] = router
+                module.urlpatterns.append(RouterURLPattern(router))
+            router.add(pattern_used, method, key, URLPATTERN_HANDLERS[key])
             # Attach metadata
             view_func.__url__ = (method, pattern_used)
             return view_func
@@ -0,0 +1,259 @@
+import os
+import glob
+import time
+import fcntl
+import atexit
+import threading
+import ujson
+from django.db import connections
+from jestit.helpers.settings import settings
+from jestit.helpers import logit
+from jestit.helpers import paths
+
+logger = logit.get_logger("batchwriter", "batchwriter.log")
+
+# rows written per bulk_create, reaching it also wakes the writer early
+BATCH_SIZE = settings.get("JESTIT_AUDIT_BATCH_SIZE", 500)
+# milliseconds between flushes, 0 writes every row immediately
+FLUSH_MS = settings.get("JESTIT_AUDIT_FLUSH_MS", 1000)
+# rows held in memory, beyond it rows go straight to the spill file
+BUFFER_MAX = settings.get("JESTIT_AUDIT_BUFFER_MAX", 50000)
+SPILL_FOLDER = settings.get("JESTIT_AUDIT_SPILL_FOLDER", os.path.join(paths.VAR_ROOT, "spill"))
+
+
+class BatchWriter:
+    """
+    Buffers rows (dicts of model field values) in memory and inserts them with
+    `bulk_create` from a background thread, every `interval` milliseconds or as soon
+    as `batch_size` rows are waiting.
+
+    Rows that cannot be written (the database is down, or the buffer is full) are
+    appended to a JSON lines spill file and replayed after the next successful write.
+    The spill file is shared by every process, appends and replays hold an `fcntl` lock
+    on it and a replay claims the file by renaming it, so each row is replayed once.
+    """
+
+    def __init__(self, model, batch_size=BATCH_SIZE, interval=FLUSH_MS, max_buffer=BUFFER_MAX, spill_path=None):
+        """
+        :param model: The model rows are created for.
+        :param batch_size: Rows per bulk insert.
+        :param interval: Milliseconds between flushes, 0 writes synchronously.
+        :param max_buffer: Rows kept in memory before spilling to disk.
+        :param spill_path: The spill file, defaults to `<label>.spill` under SPILL_FOLDER.
+        """
+        self.model = model
+        self.batch_size = batch_size
+        self.interval = interval
+        self.max_buffer = max_buffer
+        if spill_path is None:
+            spill_path = os.path.join(SPILL_FOLDER, f"{model._meta.label_lower}.spill")
+        self.spill_path = spill_path
+        self.buffer = []
+        # rows that did not fit the buffer, spilled by the writer thread
+        self.overflow = []
+        self.lock = threading.Lock()
+        # one flush at a time, the thread and atexit may both flush
+        self.flush_lock = threading.Lock()
+        self.wakeup = threading.Event()
+        self.stopped = False
+        self.thread = None
+
+    def add(self, row):
+        """
+        Queues a row for the next flush, only takes a lock and appends.
+        """
+        with self.lock:
+            if len(self.buffer) >= self.max_buffer:
+                # never touch the disk on the caller's thread
+                self.overflow.append(row)
+            else:
+                self.buffer.append(row)
+            size = len(self.buffer) + len(self.overflow)
+        if not self.interval:
+            self.flush()
+            return
+        self.start()
+        if size >= self.batch_size:
+            self.wakeup.set()
+
+    def start(self):
+        if self.thread is not None:
+            return
+        with self.lock:
+            if self.thread is not None:
+                return
+            self.stopped = False
+            self.thread = threading.Thread(target=self.run, name="batch_writer", daemon=True)
+            self.thread.start()
+
+    def run(self):
+        while not self.stopped:
+            self.wakeup.wait(self.interval / 1000.0)
+            self.wakeup.clear()
+            try:
+                self.flush()
+            except Exception as err:
+                logger.exception(err)
+            finally:
+                connections.close_all()
+
+    def flush(self):
+        """
+        Writes the buffered rows, spilling them to disk when the insert fails.
+        Returns the number of rows written.
+        """
+        with self.flush_lock:
+            with self.lock:
+                rows, self.buffer = self.buffer, []
+                overflow, self.overflow = self.overflow, []
+            if overflow:
+                self.spill(overflow)
+            if not rows:
+                return 0
+            try:
+                self.write(rows)
+            except Exception as err:
+                logger.exception(err)
+                self.spill(rows)
+                return 0
+            # the database is reachable, catch up on anything spilled
+            return len(rows) + self.replay()
+
+    def write(self, rows):
+        self.model.objects.bulk_create([self.model(**row) for row in rows], batch_size=self.batch_size)
+
+    def spill(self, rows):
+        """Appends rows to the spill file, one JSON document per line."""
+        lines = "".join(ujson.dumps(row, default=str) + "\n" for row in rows)
+        os.makedirs(os.path.dirname(self.spill_path), exist_ok=True)
+        while True:
+            with open(self.spill_path, "a") as spill_file:
+                fcntl.flock(spill_file, fcntl.LOCK_EX)
+                # a replay may have claimed the file between open and lock, append to the new one
+                if not self.is_same_file(spill_file, self.spill_path):
+                    continue
+                spill_file.write(lines)
+                spill_file.flush()
+                os.fsync(spill_file.fileno())
+                return
+
+    def replay(self):
+        """
+        Writes rows left in spill files (by a failed flush or a crashed process) in
+        `batch_size` chunks. Returns the number of rows written.
+        """
+        try:
+            # claims the spill file, new spills go to a fresh file while this one is replayed
+            os.replace(self.spill_path, f"{self.spill_path}.{os.getpid()}.{time.time_ns()}.replay")
+        except FileNotFoundError:
+            pass
+        total = 0
+        # also picks up files claimed by processes that died while replaying
+        for replay_path in glob.glob(f"{glob.escape(self.spill_path)}.*.replay"):
+            total += self.replay_file(replay_path)
+        return total
+
+    def replay_file(self, replay_path):
+        try:
+            replay_file = open(replay_path)
+        except FileNotFoundError:
+            return 0
+        with replay_file:
+            try:
+                fcntl.flock(replay_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except BlockingIOError:
+                return 0  # another process is replaying it
+            if not self.is_same_file(replay_file, replay_path):
+                return 0  # replayed and removed while we opened it
+            total = 0
+            rows = []
+            for line in replay_file:
+                if line.strip():
+                    rows.append(ujson.loads(line))
+                if len(rows) >= self.batch_size:
+                    if not self.replay_rows(rows, replay_file):
+                        return total
+                    total += len(rows)
+                    rows = []
+            if rows and not self.replay_rows(rows, replay_file):
+                return total
+            total += len(rows)
+            os.remove(replay_path)
+        if total:
+            logger.info(f"replayed {total} spilled rows into {self.model._meta.label}")
+        return total
+
+    def replay_rows(self, rows, replay_file):
+        """
+        Writes a chunk of replayed rows, when it fails the chunk and the rest of the file
+        go back to the spill file and the replay file is removed.
+        """
+        try:
+            self.write(rows)
+            return True
+        except Exception as err:
+            logger.exception(err)
+        self.spill(rows)
+        rest = []
+        for line in replay_file:
+            if line.strip():
+                rest.append(ujson.loads(line))
+            if len(rest) >= self.batch_size:
+                self.spill(rest)
+                rest = []
+        if rest:
+            self.spill(rest)
+        os.remove(replay_file.name)
+        return False
+
+    @staticmethod
+    def is_same_file(file, path):
+        try:
+            return os.path.samestat(os.fstat(file.fileno()), os.stat(path))
+        except FileNotFoundError:
+            return False
+
+    def stop(self):
+        """
+        Stops the writer thread and writes anything still buffered.
+        """
+        self.stopped = True
+        self.wakeup.set()
+        try:
+            self.flush()
+        except Exception as err:
+            logger.exception(err)
+
+    def reset(self):
+        # forked children start empty, the parent writes what it buffered
+        self.buffer = []
+        self.overflow = []
+        self.lock = threading.Lock()
+        self.flush_lock = threading.Lock()
+        self.wakeup = threading.Event()
+        self.thread = None
+
+
+WRITERS = {}
+
+
+def get_writer(model):
+    writer = WRITERS.get(model)
+    if writer is None:
+        writer = WRITERS.setdefault(model, BatchWriter(model))
+    return writer
+
+
+@atexit.register
+def flush_all():
+    for writer in list(WRITERS.values()):
+        writer.stop()
+
+
+def reset_all():
+    for writer in WRITERS.values():
+        writer.reset()
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=reset_all)
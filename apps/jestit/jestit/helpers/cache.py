@@ -0,0 +1,109 @@
+import time
+import threading
+from collections import OrderedDict
+from jestit.helpers.settings import settings
+
+
+class LRUCache:
+    """
+    A thread safe in-process LRU cache with an optional per entry TTL.
+    """
+
+    def __init__(self, max_size=1000, ttl=None):
+        """
+        :param max_size: Maximum number of entries kept before the oldest is evicted.
+        :param ttl: Seconds an entry stays valid, None keeps entries until evicted.
+        """
+        self.max_size = max_size
+        self.ttl = ttl
+        self.data = OrderedDict()
+        self.lock = threading.RLock()
+
+    def get(self, key, default=None):
+        with self.lock:
+            entry = self.data.get(key, None)
+            if entry is None:
+                return default
+            expires, value = entry
+            if expires is not None and expires < time.time():
+                del self.data[key]
+                return default
+            self.data.move_to_end(key)
+            return value
+
+    def set(self, key, value, ttl=None):
+        ttl = self.ttl if ttl is None else ttl
+        expires = time.time() + ttl if ttl else None
+        with self.lock:
+            self.data[key] = (expires, value)
+            self.data.move_to_end(key)
+            while len(self.data) > self.max_size:
+                self.data.popitem(last=False)
+
+    def delete(self, key):
+        with self.lock:
+            self.data.pop(key, None)
+
+    def clear(self):
+        with self.lock:
+            self.data.clear()
+
+
+class DjangoCache:
+    """
+    Adapts a Django cache alias to the same get/set/delete interface as LRUCache.
+
+    Keys are namespaced by `prefix` and entries are stored with the prefix generation,
+    `clear` bumps the generation so only this namespace is invalidated, never the whole alias.
+    """
+
+    def __init__(self, alias="default", ttl=None, prefix="jestit"):
+        from django.core.cache import caches
+        self.cache = caches[alias]
+        self.ttl = ttl
+        self.prefix = prefix
+        self.generation_key = f"{prefix}:generation"
+
+    def make_key(self, key):
+        return f"{self.prefix}:{key}"
+
+    def get(self, key, default=None):
+        # the generation and the entry are read in one round trip
+        values = self.cache.get_many([self.generation_key, self.make_key(key)])
+        entry = values.get(self.make_key(key), None)
+        if entry is None or entry[0] != values.get(self.generation_key, 0):
+            return default
+        return entry[1]
+
+    def set(self, key, value, ttl=None):
+        generation = self.cache.get(self.generation_key, 0)
+        self.cache.set(self.make_key(key), (generation, value), self.ttl if ttl is None else ttl)
+
+    def delete(self, key):
+        self.cache.delete(self.make_key(key))
+
+    def clear(self):
+        # stale entries are ignored from now on and age out with their ttl
+        self.cache.add(self.generation_key, 0, None)
+        self.cache.incr(self.generation_key)
+
+
+def create_cache(backend="lru", max_size=1000, ttl=None, alias="default", prefix="jestit"):
+    """
+    Returns a cache for the backend name, "lru" (in-process) or "django" (a CACHES alias).
+    Returns None when the backend is disabled.
+    """
+    if not backend:
+        return None
+    if backend == "django":
+        return DjangoCache(alias, ttl, prefix)
+    return LRUCache(max_size, ttl)
+
+
+# cache of serialized on_rest_get responses, JESTIT_GET_CACHE=None disables it
+GET_CACHE = create_cache(
+    settings.get("JESTIT_GET_CACHE", "lru"),
+    max_size=settings.get("JESTIT_GET_CACHE_SIZE", 2000),
+    ttl=settings.get("JESTIT_GET_CACHE_TTL", 300),
+    alias=settings.get("JESTIT_GET_CACHE_ALIAS", "default"),
+    prefix="jestit_get")
@@ -0,0 +1,46 @@
+import uuid
+import contextvars
+from concurrent.futures import ThreadPoolExecutor
+
+# the request being handled by the current thread or task
+ACTIVE_REQUEST = contextvars.ContextVar("jestit_active_request", default=None)
+
+
+def get_request():
+    """Returns the request active in the current context, or None."""
+    return ACTIVE_REQUEST.get()
+
+
+def set_request(request):
+    """Makes `request` the active request, returns the token to pass to `reset_request`."""
+    return ACTIVE_REQUEST.set(request)
+
+
+def reset_request(token):
+    ACTIVE_REQUEST.reset(token)
+
+
+def get_request_id():
+    """
+    Returns the id of the active request, taken from the X-Request-ID header or
+    generated on first use, None outside a request.
+    """
+    request = ACTIVE_REQUEST.get()
+    if request is None:
+        return None
+    request_id = getattr(request, "request_id", None)
+    if request_id is None:
+        request_id = request.META.get("HTTP_X_REQUEST_ID", None) or uuid.uuid4().hex
+        request.request_id = request_id
+    return request_id
+
+
+class ContextThreadPoolExecutor(ThreadPoolExecutor):
+    """
+    A ThreadPoolExecutor whose tasks run in a copy of the submitting context,
+    so the active request (and any other context variable) follows the work into the thread.
+    """
+
+    def submit(self, fn, /, *args, **kwargs):
+        context = contextvars.copy_context()
+        return super().submit(context.run, fn, *args, **kwargs)
@@ -0,0 +1,194 @@
+import re
+import time
+import threading
+from asgiref.sync import sync_to_async
+from django.apps import apps
+from django.db import connections
+from django.db.models.signals import post_save, post_delete
+from jestit.helpers.settings import settings
+
+# seconds a list count is reused, 0 disables the cache
+COUNT_CACHE_TTL = settings.get("JESTIT_COUNT_CACHE_TTL", 10)
+COUNT_CACHE_MAX = settings.get("JESTIT_COUNT_CACHE_MAX", 5000)
+NO_COUNT = ["0", "false", "f", "off", "n", "no", "none"]
+
+# {query key: (expires, count, ((model label, version), ...))}
+COUNT_CACHE = {}
+# bumped on every save/delete so cached counts touching the table go stale
+MODEL_VERSIONS = {}
+WATCHED_MODELS = set()
+# {db_table: model}, built on first use once every app is loaded
+TABLE_MODELS = {}
+LOCK = threading.RLock()
+
+
+class EstimatedCount(int):
+    """A count read from table statistics, approximate (see `estimate_count`)."""
+
+
+def get_count(queryset, mode="exact"):
+    """
+    Returns the count for a list queryset based on the requested mode.
+
+    :param queryset: The filtered list queryset.
+    :param mode: "exact" (cached), "estimate" or a false value to skip counting.
+    :return: The count or None when counting is disabled.
+    """
+    mode = str(mode).lower()
+    if mode in NO_COUNT:
+        return None
+    if mode == "estimate":
+        return estimate_count(queryset)
+    return cached_count(queryset)
+
+
+def cached_count(queryset, ttl=None):
+    """
+    Returns `queryset.count()`, reusing the result for `ttl` seconds.
+    Keyed by the compiled count query (model, filters and group), and dropped whenever
+    an instance of any model the query reads (including subqueries) is saved or deleted
+    in this process.
+    """
+    ttl = COUNT_CACHE_TTL if ttl is None else ttl
+    if not ttl:
+        return queryset.count()
+    key, count, deps = lookup_count(queryset)
+    if deps is None:
+        return count
+    count = queryset.count()
+    store_count(key, ttl, count, deps)
+    return count
+
+
+async def aget_count(queryset, mode="exact"):
+    """
+    Async `get_count`, exact counts use `acount()`.
+    """
+    mode = str(mode).lower()
+    if mode in NO_COUNT:
+        return None
+    if mode == "estimate":
+        # reads planner statistics with a raw cursor
+        return await sync_to_async(estimate_count)(queryset)
+    return await acached_count(queryset)
+
+
+async def acached_count(queryset, ttl=None):
+    """
+    Async `cached_count`.
+    """
+    ttl = COUNT_CACHE_TTL if ttl is None else ttl
+    if not ttl:
+        return await queryset.acount()
+    key, count, deps = lookup_count(queryset)
+    if deps is None:
+        return count
+    count = await queryset.acount()
+    store_count(key, ttl, count, deps)
+    return count
+
+
+def lookup_count(queryset):
+    """
+    Returns (key, count, None) for a cached count, otherwise (key, None, deps) with the
+    model versions to store the fresh count against.
+    """
+    sql, params = queryset.order_by().query.sql_with_params()
+    key = f"{queryset.db}|{sql}|{params}"
+    entry = COUNT_CACHE.get(key)
+    if entry is not None and entry[0] > time.time() and is_current(entry[2]):
+        return key, entry[1], None
+    models = get_query_models(queryset, sql)
+    with LOCK:
+        for model in models:
+            watch_model(model)
+    # versions are read before counting so a concurrent save leaves the entry stale
+    deps = tuple((model._meta.label, MODEL_VERSIONS.get(model._meta.label, 0)) for model in models)
+    return key, None, deps
+
+
+def store_count(key, ttl, count, deps):
+    with LOCK:
+        if len(COUNT_CACHE) >= COUNT_CACHE_MAX:
+            COUNT_CACHE.clear()
+        COUNT_CACHE[key] = (time.time() + ttl, count, deps)
+
+
+def is_current(deps):
+    for label, version in deps:
+        if MODEL_VERSIONS.get(label, 0) != version:
+            return False
+    return True
+
+
+def get_query_models(queryset, sql):
+    """
+    Returns the models whose tables appear in the compiled query.
+    """
+    if not TABLE_MODELS:
+        with LOCK:
+            TABLE_MODELS.update((model._meta.db_table, model) for model in apps.get_models())
+    # every quoted identifier of the query, columns and aliases simply miss the table map
+    quote = connections[queryset.db].ops.quote_name("x")
+    names = set(re.findall(f"{re.escape(quote[0])}([^{re.escape(quote[-1])}]+){re.escape(quote[-1])}", sql))
+    return [TABLE_MODELS[name] for name in names if name in TABLE_MODELS]
+
+
+def invalidate(model):
+    """Marks every cached count that reads the model as stale."""
+    label = model._meta.label
+    with LOCK:
+        MODEL_VERSIONS[label] = MODEL_VERSIONS.get(label, 0) + 1
+
+
+def on_model_changed(sender, **kwargs):
+    invalidate(sender)
+
+
+def watch_model(model):
+    if model in WATCHED_MODELS:
+        return
+    WATCHED_MODELS.add(model)
+    uid = f"jestit_counts_{model._meta.label}"
+    post_save.connect(on_model_changed, sender=model, weak=False, dispatch_uid=uid)
+    post_delete.connect(on_model_changed, sender=model, weak=False, dispatch_uid=uid)
+
+
+def estimate_count(queryset):
+    """
+    Returns a cheap row estimate from database statistics when the queryset is unfiltered,
+    otherwise falls back to the cached exact count. Estimates are returned as an
+    `EstimatedCount` so responses can flag them as approximate.
+    """
+    if queryset.query.where or queryset.query.distinct or queryset.query.combinator:
+        return cached_count(queryset)
+    estimate = get_table_estimate(queryset.model, queryset.db)
+    if estimate is None:
+        return cached_count(queryset)
+    return EstimatedCount(estimate)
+
+
+def get_table_estimate(model, using="default"):
+    """
+    Reads the planner statistics for the model table, None when the backend has none.
+    """
+    connection = connections[using]
+    table = model._meta.db_table
+    vendor = connection.vendor
+    with connection.cursor() as cursor:
+        if vendor == "postgresql":
+            cursor.execute("SELECT reltuples::bigint FROM pg_class WHERE oid = to_regclass(%s)", [table])
+        elif vendor == "mysql":
+            cursor.execute(
+                "SELECT TABLE_ROWS FROM information_schema.TABLES "
+                "WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = %s", [table])
+        elif vendor == "sqlite":
+            # rowid range is read from the ends of the btree, deleted rows are still counted
+            cursor.execute(f'SELECT MAX(rowid) - MIN(rowid) + 1 FROM "{table}"')
+        else:
+            return None
+        row = cursor.fetchone()
+    if row is None or row[0] is None or row[0] < 0:
+        # never analyzed (postgres reports -1) or an empty table
+        return None
+    return int(row[0])
@@ -1,8 +1,18 @@
 import os
 import sys
+import copy
+import gzip
+import time
+import queue
+import random
+import shutil
+import ujson
+import atexit
 import logging
+import logging.handlers
 import threading
 from decimal import Decimal
+from datetime import datetime, timezone
 from collections import OrderedDict
 from io import StringIO
 from typing import Optional
@@ -11,6 +21,7 @@ from typing import Optional
 # from datetime import datetime
 # from binascii import hexlify
 from . import paths
+from . import context
 
 # Resolve paths
 LOG_DIR = paths.LOG_ROOT
@@ -21,8 +32,16 @@ os.makedirs(LOG_DIR, exist_ok=True)
 # Constants
 MAX_LOG_SIZE = 10 * 1024 * 1024  # 10MB
 LOG_BACKUP_COUNT = 3
+LOG_ROTATE_INTERVAL = 0  # seconds, 0 only rotates on size
+LOG_COMPRESS = True
+# "text" or "json" (one ujson line per record)
+LOG_FORMAT = "text"
 COLOR_LOGS = True
 LOG_MANAGER = None
+# policies for a full log queue
+QUEUE_DROP = "drop"  # discard the new record
+QUEUE_DROP_OLDEST = "drop_oldest"  # discard the oldest queued record
+QUEUE_BLOCK = "block"  # wait for the writer thread
 
 def get_logger(name, filename=None, debug=False):
     global LOG_MANAGER
@@ -31,6 +50,15 @@ def get_logger(name, filename=None, debug=False):
     return LOG_MANAGER.get_logger(name, filename, debug)
 
 
+def get_setting(name, default=None):
+    """Reads a Django setting, the default when settings are not configured (ie testit)."""
+    try:
+        from .settings import settings
+        return settings.get(name, default)
+    except Exception:
+        return default
+
+
 def pretty_print(msg):
     out = PrettyLogger.pretty_format(msg)
     print(out)
@@ -63,8 +91,57 @@ class LogManager:
             cls._instance.streams = {}
             cls._instance.master_logger = None
             cls._instance.lock = ThreadSafeLock()
+            cls._instance.queue = None
+            cls._instance.listener = None
+            cls._instance.queue_handlers = []
+            cls._instance.max_bytes = get_setting("JESTIT_LOG_MAX_SIZE", MAX_LOG_SIZE)
+            cls._instance.backup_count = get_setting("JESTIT_LOG_BACKUP_COUNT", LOG_BACKUP_COUNT)
+            cls._instance.rotate_interval = get_setting("JESTIT_LOG_ROTATE_INTERVAL", LOG_ROTATE_INTERVAL)
+            cls._instance.compress = get_setting("JESTIT_LOG_COMPRESS", LOG_COMPRESS)
+            cls._instance.log_format = get_setting("JESTIT_LOG_FORMAT", LOG_FORMAT)
+            # {logger name: fraction of debug/info records kept}
+            cls._instance.sampling = get_setting("JESTIT_LOG_SAMPLING", {})
+            if get_setting("JESTIT_LOG_QUEUE", False):
+                cls._instance.start_queue(
+                    get_setting("JESTIT_LOG_QUEUE_SIZE", 10000),
+                    get_setting("JESTIT_LOG_QUEUE_POLICY", QUEUE_DROP))
         return cls._instance
 
+    def start_queue(self, maxsize=10000, policy=QUEUE_DROP):
+        """
+        Moves formatting and file writes of new loggers to a background thread.
+        Records are queued unformatted, a full queue applies `policy`.
+        """
+        with self.lock:
+            if self.listener is not None:
+                return
+            self.queue_policy = policy
+            self.queue = queue.Queue(maxsize)
+            self.listener = LogQueueListener(self.queue)
+            self.listener.start()
+            atexit.register(self.stop_queue)
+            if hasattr(os, "register_at_fork"):
+                # the writer thread does not survive a fork, workers need their own
+                os.register_at_fork(after_in_child=self._restart_queue)
+
+    def stop_queue(self):
+        """Writes out the queued records and stops the writer thread."""
+        if self.listener is not None and self.listener._thread is not None:
+            self.listener.stop()
+
+    def _restart_queue(self):
+        if self.listener is None:
+            return
+        self.queue = queue.Queue(self.queue.maxsize)
+        for handler in self.queue_handlers:
+            handler.queue = self.queue
+        self.listener = LogQueueListener(self.queue)
+        self.listener.start()
+
+    def get_dropped(self):
+        """Returns the number of records dropped because the queue was full."""
+        return sum(handler.dropped for handler in self.queue_handlers)
+
     def get_logger(self, name, filename=None, debug=False):
         """Retrieve or create a logger."""
         with self.lock:
@@ -75,35 +152,65 @@ class LogManager:
             logger = logging.getLogger(name)
             logger.setLevel(level)
 
+            handlers = []
             # Create file handler
             if filename:
-                log_path = os.path.join(LOG_DIR, filename)
-                file_handler = logging.FileHandler(log_path)
-                file_handler.setFormatter(self._get_formatter())
-                logger.addHandler(file_handler)
+                handlers.append(self.get_file_handler(filename))
 
             # Capture to master logger if exists
             if self.master_logger:
-                logger.addHandler(logging.StreamHandler(sys.stdout))
+                handlers.append(logging.StreamHandler(sys.stdout))
 
-            self.loggers[name] = Logger(name, filename, logger)
+            if self.queue is not None and handlers:
+                queue_handler = LogQueueHandler(self.queue, handlers, self.queue_policy)
+                self.queue_handlers.append(queue_handler)
+                logger.addHandler(queue_handler)
+            else:
+                for handler in handlers:
+                    logger.addHandler(handler)
+
+            self.loggers[name] = Logger(
+                name, filename, logger, self.sampling.get(name, 1.0), self.log_format == "json")
             return self.loggers[name]
 
+    def get_file_handler(self, filename):
+        """
+        Returns the rotating handler for a file under LOG_DIR, one per file so loggers
+        sharing a file share its stream, lock and rotation.
+        """
+        with self.lock:
+            handler = self.streams.get(filename, None)
+            if handler is None:
+                handler = LogFileHandler(
+                    os.path.join(LOG_DIR, filename), self.max_bytes, self.backup_count,
+                    self.rotate_interval, self.compress)
+                handler.setFormatter(self._get_formatter())
+                self.streams[filename] = handler
+            return handler
+
     def set_master_logger(self, logger: logging.Logger):
         """Assign master logger for global logging."""
         with self.lock:
             self.master_logger = logger
 
     def _get_formatter(self) -> logging.Formatter:
+        if self.log_format == "json":
+            return JsonFormatter()
         return logging.Formatter("%(asctime)s - %(levelname)s - %(name)s: %(message)s")
 
 
 # Logger Wrapper
 class Logger:
-    def __init__(self, name, filename, logger):
+    def __init__(self, name, filename, logger, sample_rate=1.0, structured=False):
+        """
+        :param sample_rate: Fraction of debug and info records kept, warnings and errors are always kept.
+        :param structured: Tag records with the active request id for the JSON formatter.
+        """
         self.name = name
         self.filename = filename
         self.logger = logger
+        self.sample_rate = sample_rate
+        self.structured = structured
 
     def _build_log(self, *args):
         output = []
@@ -115,23 +222,158 @@ class Logger:
                 output.append(str(arg))
         return "\n".join(output)
 
+    def _log(self, level, args, exc_info=False):
+        if not self.logger.isEnabledFor(level):
+            return
+        if level < logging.WARNING and self.sample_rate < 1.0 and random.random() >= self.sample_rate:
+            return
+        extra = None
+        if self.structured:
+            # read here, queued records are formatted on another thread
+            extra = dict(request_id=context.get_request_id())
+        self.logger.log(level, LogMessage(self, args), exc_info=exc_info, extra=extra)
+
     def info(self, *args):
-        self.logger.info(self._build_log(*args))
+        self._log(logging.INFO, args)
 
     def debug(self, *args):
-        self.logger.debug(self._build_log(*args))
+        self._log(logging.DEBUG, args)
 
     def warning(self, *args):
-        self.logger.warning(self._build_log(*args))
+        self._log(logging.WARNING, args)
 
     def error(self, *args):
-        self.logger.error(self._build_log(*args))
+        self._log(logging.ERROR, args)
 
     def critical(self, *args):
-        self.logger.critical(self._build_log(*args))
+        self._log(logging.CRITICAL, args)
 
     def exception(self, *args):
-        self.logger.exception(self._build_log(*args))
+        self._log(logging.ERROR, args, exc_info=True)
+
+
+class LogMessage:
+    """
+    The arguments of a log call, built into the message text only when a handler formats
+    the record (on the writer thread in queue mode).
+    """
+    __slots__ = ("logger", "args")
+
+    def __init__(self, logger, args):
+        self.logger = logger
+        self.args = args
+
+    def freeze(self):
+        # dicts and lists are often changed after logging, keep what was logged
+        return LogMessage(self.logger, tuple(
+            copy.copy(arg) if isinstance(arg, (dict, list)) else arg for arg in self.args))
+
+    def __str__(self):
+        return self.logger._build_log(*self.args)
+
+    def split(self):
+        """Returns the text arguments joined by spaces and the dict arguments merged."""
+        text = []
+        fields = {}
+        for arg in self.args:
+            if isinstance(arg, dict):
+                fields.update(arg)
+            else:
+                text.append(str(arg))
+        return " ".join(text), fields
+
+
+class JsonFormatter(logging.Formatter):
+    """
+    Formats a record as one compact JSON line with timestamp, logger, level,
+    request id, message and fields (the dicts passed to the log call).
+    """
+
+    def format(self, record):
+        entry = dict(
+            timestamp=datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec="milliseconds"),
+            logger=record.name,
+            level=record.levelname)
+        request_id = getattr(record, "request_id", None)
+        if request_id is not None:
+            entry["request_id"] = request_id
+        if isinstance(record.msg, LogMessage):
+            entry["msg"], fields = record.msg.split()
+            if fields:
+                entry["fields"] = fields
+        else:
+            entry["msg"] = record.getMessage()
+        if record.exc_info and not record.exc_text:
+            record.exc_text = self.formatException(record.exc_info)
+        if record.exc_text:
+            entry["exc"] = record.exc_text
+        return ujson.dumps(entry, default=str)
+
+
+class LogQueueHandler(logging.handlers.QueueHandler):
+    """
+    Queues records for the `LogQueueListener` thread, which formats them and writes
+    them to `targets`.
+    """
+
+    def __init__(self, log_queue, targets, policy=QUEUE_DROP):
+        super().__init__(log_queue)
+        self.targets = targets
+        self.policy = policy
+        self.dropped = 0
+        self.reported = 0
+
+    def prepare(self, record):
+        # unlike QueueHandler the message is left unformatted
+        if isinstance(record.msg, LogMessage):
+            record.msg = record.msg.freeze()
+        if record.exc_info:
+            # tracebacks hold frames, render them before leaving the thread
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        record.targets = self.targets
+        return record
+
+    def enqueue(self, record):
+        if self.policy == QUEUE_BLOCK:
+            self.queue.put(record)
+            return
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            if self.policy == QUEUE_DROP_OLDEST:
+                try:
+                    self.queue.get_nowait()
+                    self.queue.put_nowait(record)
+                    self.dropped += 1
+                    return
+                except (queue.Empty, queue.Full):
+                    pass
+            self.dropped += 1
+            return
+        if self.dropped != self.reported:
+            dropped = self.dropped - self.reported
+            self.reported = self.dropped
+            warning = logging.makeLogRecord(dict(
+                name=record.name, levelno=logging.WARNING, levelname="WARNING",
+                msg=f"log queue full, dropped {dropped} records", targets=self.targets))
+            try:
+                self.queue.put_nowait(warning)
+            except queue.Full:
+                pass
+
+
+class LogQueueListener(logging.handlers.QueueListener):
+    """Writes queued records to the handlers of the logger that queued them."""
+
+    def enqueue_sentinel(self):
+        # wait for room, the writer thread is still draining
+        self.queue.put(self._sentinel)
+
+    def handle(self, record):
+        for handler in record.targets:
+            if record.levelno >= handler.level:
+                handler.handle(record)
 
 
 # Log Formatting with Colors
@@ -242,15 +484,76 @@ class ConsoleLogger:
 
 
 # Rotating File Handler
+class LogFileHandler(logging.handlers.RotatingFileHandler):
+    """
+    Rolls the file over when it reaches `max_bytes` or, with `interval` seconds, at each
+    interval boundary. Rotated files are gzipped by a background thread so the write
+    that triggered the rollover only pays for a rename.
+    """
+
+    def __init__(self, filename, max_bytes=MAX_LOG_SIZE, backup_count=LOG_BACKUP_COUNT,
+                 interval=LOG_ROTATE_INTERVAL, compress=LOG_COMPRESS):
+        super().__init__(filename, maxBytes=max_bytes, backupCount=backup_count, delay=True)
+        self.interval = interval
+        self.rollover_at = self.compute_rollover(time.time())
+        self.compressor = None
+        if compress:
+            self.namer = self.gzip_name
+            self.rotator = self.rotate_file
+
+    def compute_rollover(self, now):
+        if not self.interval:
+            return None
+        # aligned to the epoch so daily files roll at midnight UTC
+        return (int(now // self.interval) + 1) * self.interval
+
+    def shouldRollover(self, record):
+        if self.rollover_at is not None and record.created >= self.rollover_at:
+            return True
+        return super().shouldRollover(record)
+
+    def doRollover(self):
+        # the previous segment must be compressed before the backups shift
+        self.wait_compressor()
+        super().doRollover()
+        self.rollover_at = self.compute_rollover(time.time())
+
+    def gzip_name(self, name):
+        return f"{name}.gz"
+
+    def rotate_file(self, source, dest):
+        if not os.path.exists(source):
+            return
+        raw = dest[:-3]
+        os.replace(source, raw)
+        self.compressor = threading.Thread(target=self.compress_file, args=(raw, dest), daemon=True)
+        self.compressor.start()
+
+    def compress_file(self, source, dest):
+        with open(source, "rb") as src, gzip.open(f"{dest}.tmp", "wb") as out:
+            shutil.copyfileobj(src, out)
+        os.replace(f"{dest}.tmp", dest)
+        os.remove(source)
+
+    def wait_compressor(self):
+        if self.compressor is not None:
+            self.compressor.join()
+            self.compressor = None
+
+    def close(self):
+        self.wait_compressor()
+        super().close()
+
+
 class RotatingLogger:
     def __init__(self, log_file="app.log", max_bytes=MAX_LOG_SIZE, backup_count=LOG_BACKUP_COUNT):
         self.logger = logging.getLogger("RotatingLogger")
         self.logger.setLevel(logging.INFO)
 
-        handler = logging.handlers.RotatingFileHandler(
+        handler = LogFileHandler(
             os.path.join(LOG_DIR, log_file),
-            maxBytes=max_bytes,
-            backupCount=backup_count,
+            max_bytes=max_bytes,
+            backup_count=backup_count,
         )
         handler.setFormatter(logging.Formatter("%(asctime)s - %(levelname)s - %(message)s"))
         self.logger.addHandler(handler)
@@ -0,0 +1,94 @@
+from django.db.models.signals import class_prepared
+
+EMPTY = frozenset()
+
+
+def to_perm_set(value):
+    """
+    Returns a frozenset for a permission name, list of names or None.
+    """
+    if not value:
+        return EMPTY
+    if isinstance(value, frozenset):
+        return value
+    if isinstance(value, str):
+        return frozenset((value,))
+    return frozenset(value)
+
+
+def get_enabled_perms(permissions):
+    """
+    Returns the frozenset of keys enabled in a JSON permissions dict.
+    """
+    if not permissions:
+        return EMPTY
+    return frozenset(key for key, value in permissions.items() if value)
+
+
+def has_any(enabled, wanted):
+    """
+    True when any permission in `wanted` (a name or collection of names) is in `enabled`,
+    "all" in `wanted` always passes.
+    """
+    if isinstance(wanted, str):
+        return wanted == "all" or wanted in enabled
+    if "all" in wanted:
+        return True
+    return not enabled.isdisjoint(wanted)
+
+
+def has_enabled(permissions, wanted):
+    """
+    `has_any` read straight from a JSON permissions dict, nothing is compiled or cached
+    so reassigned or edited permissions are always seen.
+    """
+    if isinstance(wanted, str):
+        return wanted == "all" or bool(permissions and permissions.get(wanted, False))
+    if "all" in wanted:
+        return True
+    if not permissions:
+        return False
+    return any(permissions.get(key, False) for key in wanted)
+
+
+# the permission lookups JestitBase makes, compiled when a model class is prepared
+VIEW_KEYS = "VIEW_PERMS"
+SAVE_KEYS = ("SAVE_PERMS", "VIEW_PERMS")
+DELETE_KEYS = ("DELETE_PERMS", "SAVE_PERMS", "VIEW_PERMS")
+
+
+def compile_rest_perms(model):
+    """
+    Compiles the RestMeta *_PERMS lookups of a model into frozensets.
+    Returns the {name or tuple of names: frozenset} map stored on the model,
+    lookups resolved later are memoized in the same dict.
+    """
+    compiled = {}
+    model.__rest_perms__ = compiled
+    for key in (VIEW_KEYS, SAVE_KEYS, DELETE_KEYS):
+        resolve_rest_perms(model, key)
+    return compiled
+
+
+def resolve_rest_perms(model, names):
+    """
+    Resolves a *_PERMS name or list of names to the first one that is set (like
+    `get_rest_meta_prop`) and memoizes the frozenset on the model.
+    """
+    key = names if isinstance(names, str) else tuple(names)
+    compiled = model.__dict__.get("__rest_perms__", None)
+    if compiled is None:
+        compiled = compile_rest_perms(model)
+    perms = compiled.get(key, None)
+    if perms is None:
+        perms = to_perm_set(model.get_rest_meta_prop(list(key) if isinstance(key, tuple) else key, None))
+        compiled[key] = perms
+    return perms
+
+
+def on_class_prepared(sender, **kwargs):
+    if hasattr(sender, "get_rest_meta_prop"):
+        compile_rest_perms(sender)
+
+
+class_prepared.connect(on_class_prepared, dispatch_uid="jestit_rest_perms")
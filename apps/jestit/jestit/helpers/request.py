@@ -1,5 +1,24 @@
 import ujson
 from objict import objict
+from django.utils.functional import SimpleLazyObject
+
+BULK_KEY = "__bulk__"
+BODY_METHODS = ["POST", "PUT", "PATCH", "DELETE"]
+FORM_CONTENT_TYPES = ["multipart/form-data", "application/x-www-form-urlencoded"]
+
+
+def lazy_request_data(request):
+    """
+    Returns `request.DATA` as a lazy mapping, nothing is read from the request until the
+    handler (or a permission/group check) first touches it.
+
+    The sources are parsed together on that first access, not one by one: body values
+    override query values, so reading any key needs the body anyway. Multipart uploads are
+    parsed with the form by Django. Code that only needs the query string should read
+    `request.GET`, as the group lookup does.
+    """
+    return SimpleLazyObject(lambda: parse_request_data(request))
+
 
 def parse_request_data(request):
     """
@@ -15,20 +34,24 @@ def parse_request_data(request):
     data.update(request.GET.dict())
 
     # Handle JSON Body (for POST, PUT, PATCH, DELETE)
-    if request.method in ["POST", "PUT", "PATCH", "DELETE"]:
+    if request.method in BODY_METHODS:
         if request.content_type == "application/json":
             try:
                 json_data = ujson.loads(request.body.decode("utf-8"))
                 if isinstance(json_data, dict):  # Ensure it's a dictionary
                     data.update(json_data)
+                elif isinstance(json_data, list):
+                    # list bodies are bulk requests, "__" can never be a model field name
+                    data[BULK_KEY] = json_data
             except Exception:
                 pass  # Ignore if body isn't valid JSON
 
-        # Handle Form Data (POST, PUT, PATCH, DELETE)
-        data.update(request.POST.dict())
+        # Handle Form Data (POST, PUT, PATCH, DELETE), only form bodies need the form parser
+        elif request.content_type in FORM_CONTENT_TYPES:
+            data.update(request.POST.dict())
 
-    # Handle File Uploads
-    if request.FILES:
+    # Handle File Uploads, kept as the uploaded file handles (streamed to disk when large)
+    if request.content_type == "multipart/form-data" and request.FILES:
         data["files"] = {}
         for key in request.FILES:
             files_list = request.FILES.getlist(key)
@@ -0,0 +1,80 @@
+import os
+import gzip
+import ujson
+from jestit.helpers.settings import settings
+from jestit.helpers import logit
+from jestit.helpers import paths
+
+logger = logit.get_logger("retention", "retention.log")
+
+ARCHIVE_FOLDER = settings.get("JESTIT_ARCHIVE_FOLDER", os.path.join(paths.VAR_ROOT, "archive"))
+# rows read, archived and deleted per statement
+ARCHIVE_BATCH_SIZE = settings.get("JESTIT_ARCHIVE_BATCH_SIZE", 5000)
+
+
+def archive_rows(model, cutoff, folder=None, batch_size=ARCHIVE_BATCH_SIZE, date_field="created"):
+    """
+    Moves the rows of an append only model older than `cutoff` into gzipped JSON lines
+    files, one per day (`<folder>/<YYYY-MM-DD>.jsonl.gz`), then deletes them.
+
+    Rows are walked in primary key order and each batch is deleted by its key range,
+    so every statement is short and never holds locks on the rest of the table.
+    Returns the number of rows archived.
+    """
+    if folder is None:
+        folder = os.path.join(ARCHIVE_FOLDER, model._meta.label_lower)
+    pk_name = model._meta.pk.attname
+    fields = [field.attname for field in model._meta.concrete_fields]
+    old = model.objects.filter(**{f"{date_field}__lt": cutoff})
+    # rows are inserted in time order, the first row past the cutoff bounds the key range
+    upper = model.objects.filter(**{f"{date_field}__gte": cutoff}).order_by(date_field).values_list(
+        "pk", flat=True).first()
+    if upper is not None:
+        old = old.filter(pk__lt=upper)
+
+    total = 0
+    last_pk = None
+    while True:
+        batch = old if last_pk is None else old.filter(pk__gt=last_pk)
+        rows = list(batch.order_by("pk").values(*fields)[:batch_size])
+        if not rows:
+            break
+        first_pk, last_pk = rows[0][pk_name], rows[-1][pk_name]
+        write_archive(folder, rows, date_field)
+        # archived before deleting, a crash in between only archives the batch twice
+        old.filter(pk__gte=first_pk, pk__lte=last_pk).delete()
+        total += len(rows)
+    if total:
+        logger.info(f"archived {total} {model._meta.label} rows older than {cutoff} to {folder}")
+    return total
+
+
+def write_archive(folder, rows, date_field="created"):
+    """
+    Appends rows to the archive file of their day, each call adds a gzip member
+    (concatenated members read back as one stream).
+    """
+    days = {}
+    for row in rows:
+        days.setdefault(row[date_field].date().isoformat(), []).append(row)
+    os.makedirs(folder, exist_ok=True)
+    for day, day_rows in days.items():
+        data = "".join(ujson.dumps(row, default=to_json_value) + "\n" for row in day_rows)
+        with open(os.path.join(folder, f"{day}.jsonl.gz"), "ab") as archive:
+            archive.write(gzip.compress(data.encode("utf-8")))
+            archive.flush()
+            os.fsync(archive.fileno())
+
+
+def read_archive(path):
+    """Yields the rows of an archive file."""
+    with gzip.open(path, "rt") as archive:
+        for line in archive:
+            if line.strip():
+                yield ujson.loads(line)
+
+
+def to_json_value(value):
+    if hasattr(value, "isoformat"):
+        return value.isoformat()
+    return str(value)
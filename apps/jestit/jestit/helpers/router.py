@@ -0,0 +1,160 @@
+import re
+from asgiref.sync import iscoroutinefunction
+from django.urls.converters import get_converters
+from django.urls.resolvers import RoutePattern, RegexPattern
+
+PARAM_SEGMENT = re.compile(r"^<(?:(?P<converter>[^>:]+):)?(?P<name>\w+)>$")
+
+
+class RouteNode:
+    __slots__ = ("static", "params", "methods")
+
+    def __init__(self):
+        # {segment: RouteNode}
+        self.static = {}
+        # [(name, converter, compiled regex or None, RouteNode)]
+        self.params = []
+        # {method: (key, handler)}
+        self.methods = None
+
+
+class Router:
+    """
+    Resolves the routes registered by one app.
+
+    Routes are compiled into a trie keyed by path segment, so a lookup costs one dict
+    read per segment no matter how many routes the app has. Routes the trie cannot
+    express (regex routes and the `path` converter) are matched in order afterwards.
+    """
+
+    def __init__(self, name):
+        self.name = name
+        self.root = RouteNode()
+        # [(RoutePattern or RegexPattern, {method: (key, handler)})]
+        self.patterns = []
+        self.size = 0
+        # set once a coroutine handler is registered, sync only apps never check paths
+        self.has_async = False
+
+    def add(self, pattern, method, key, handler):
+        """
+        Registers `handler` for `pattern` and `method` ("ALL" matches any method).
+        """
+        node = self._add_segments(pattern)
+        if node is None:
+            methods = None
+            for existing, existing_methods in self.patterns:
+                if str(existing) == pattern:
+                    methods = existing_methods
+                    break
+            if methods is None:
+                methods = {}
+                is_regex = pattern.startswith("^") or pattern.endswith("$")
+                route_class = RegexPattern if is_regex else RoutePattern
+                route = route_class(pattern, is_endpoint=True)
+                self.patterns.append((route, methods))
+        else:
+            if node.methods is None:
+                node.methods = {}
+            methods = node.methods
+        methods[method] = (key, handler)
+        self.size += 1
+        if iscoroutinefunction(handler):
+            self.has_async = True
+
+    def _add_segments(self, pattern):
+        if pattern.startswith("^") or pattern.endswith("$"):
+            return None
+        converters = get_converters()
+        parsed = []
+        for segment in pattern.split("/"):
+            if "<" not in segment:
+                parsed.append((segment, None))
+                continue
+            match = PARAM_SEGMENT.match(segment)
+            if match is None or (match.group("converter") or "str") not in converters:
+                return None
+            converter_name = match.group("converter") or "str"
+            if converter_name == "path":
+                # spans segments, leave it to RoutePattern
+                return None
+            parsed.append((match.group("name"), converters[converter_name]))
+
+        node = self.root
+        for segment, converter in parsed:
+            if converter is None:
+                node = node.static.setdefault(segment, RouteNode())
+                continue
+            for name, existing, _, child in node.params:
+                if name == segment and type(existing) is type(converter):
+                    node = child
+                    break
+            else:
+                child = RouteNode()
+                # segments never hold "/", so the default str regex needs no check
+                regex = None if converter.regex == "[^/]+" else re.compile(converter.regex)
+                node.params.append((segment, converter, regex, child))
+                node = child
+        return node
+
+    def match(self, path):
+        """
+        Returns ({method: (key, handler)}, kwargs) for a path relative to the app, or None.
+        """
+        found = self._match_node(self.root, path.split("/"), 0, {})
+        if found is not None:
+            return found
+        for route, methods in self.patterns:
+            match = route.match(path)
+            if match is not None and match[0] == "":
+                return methods, match[2]
+        return None
+
+    def _match_node(self, node, segments, index, kwargs):
+        if index == len(segments):
+            if node.methods:
+                return node.methods, kwargs
+            return None
+        segment = segments[index]
+        child = node.static.get(segment, None)
+        if child is not None:
+            found = self._match_node(child, segments, index + 1, kwargs)
+            if found is not None:
+                return found
+        for name, converter, regex, child in node.params:
+            if not segment or (regex is not None and regex.fullmatch(segment) is None):
+                continue
+            try:
+                value = converter.to_python(segment)
+            except ValueError:
+                continue
+            found = self._match_node(child, segments, index + 1, dict(kwargs, **{name: value}))
+            if found is not None:
+                return found
+        return None
+
+    def is_async(self, path):
+        """
+        True when a handler registered for the path is a coroutine function.
+        """
+        if not self.has_async:
+            return False
+        found = self.match(path)
+        if found is None:
+            return False
+        return any(iscoroutinefunction(handler) for _, handler in found[0].values())
+
+    def resolve(self, method, path):
+        """
+        Returns (key, handler, kwargs) for the request method and path, None when the path is unknown.
+        Prefers the handler registered for the method, then "ALL", then the first one registered
+        for the path (url patterns have always matched regardless of the decorator method).
+        """
+        found = self.match(path)
+        if found is None:
+            return None
+        methods, kwargs = found
+        entry = methods.get(method, None) or methods.get("ALL", None)
+        if entry is None:
+            entry = next(iter(methods.values()))
+        return entry[0], entry[1], kwargs
@@ -0,0 +1,168 @@
+import time
+import threading
+import contextvars
+from bisect import bisect_left
+
+# upper bounds of the histogram buckets, the last bucket catches everything above
+MS_BUCKETS = (1, 2, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000)
+COUNT_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100, 250, 500, 1000)
+SIZE_BUCKETS = (1024, 4096, 16384, 65536, 262144, 1048576, 4194304, 16777216)
+
+# {route key: RouteStats}
+ROUTE_STATS = {}
+LOCK = threading.Lock()
+# the timer of the request running in the current context, copied into sync_to_async threads
+ACTIVE_TIMER = contextvars.ContextVar("jestit_active_timer", default=None)
+
+
+class Histogram:
+    """
+    A fixed bucket histogram, cheap enough to update on every request.
+    Percentiles are estimated as the upper bound of the bucket they fall in.
+    """
+
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.count = 0
+        self.total = 0
+        self.max = 0
+
+    def observe(self, value):
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.count += 1
+        self.total += value
+        if value > self.max:
+            self.max = value
+
+    def percentile(self, pct):
+        if not self.count:
+            return None
+        wanted = self.count * pct / 100.0
+        seen = 0
+        for index, count in enumerate(self.counts):
+            seen += count
+            if seen >= wanted:
+                return self.buckets[index] if index < len(self.buckets) else self.max
+        return self.max
+
+    def to_dict(self):
+        return dict(
+            count=self.count,
+            mean=round(self.total / self.count, 3) if self.count else None,
+            max=round(self.max, 3),
+            p50=self.percentile(50), p95=self.percentile(95), p99=self.percentile(99),
+            buckets={str(bound): count for bound, count in zip(self.buckets + ("inf",), self.counts) if count})
+
+
+class RouteStats:
+    """Histograms of one route key."""
+
+    def __init__(self):
+        self.total_ms = Histogram(MS_BUCKETS)
+        self.db_ms = Histogram(MS_BUCKETS)
+        self.queries = Histogram(COUNT_BUCKETS)
+        self.serialize_ms = Histogram(MS_BUCKETS)
+        self.size = Histogram(SIZE_BUCKETS)
+
+    def observe(self, timer, size):
+        self.total_ms.observe(timer.total * 1000)
+        self.db_ms.observe(timer.db_time * 1000)
+        self.queries.observe(timer.queries)
+        self.serialize_ms.observe(timer.serialize_time * 1000)
+        if size is not None:
+            self.size.observe(size)
+
+    def to_dict(self):
+        return dict(
+            total_ms=self.total_ms.to_dict(), db_ms=self.db_ms.to_dict(), queries=self.queries.to_dict(),
+            serialize_ms=self.serialize_ms.to_dict(), size=self.size.to_dict())
+
+
+class RequestTimer:
+    """
+    Timings of a single request, set as `request.timer` by the timing middleware.
+    `key` is filled in by the dispatcher with the URLPATTERN_METHODS key of the route.
+    """
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.total = 0
+        self.key = None
+        self.queries = 0
+        self.db_time = 0
+        self.serialize_time = 0
+
+    def stop(self):
+        self.total = time.perf_counter() - self.started
+        return self.total
+
+    def get_server_timing(self):
+        """Returns the `Server-Timing` header value, durations in milliseconds."""
+        return (
+            f"total;dur={self.total * 1000:.1f}, "
+            f'db;dur={self.db_time * 1000:.1f};desc="{self.queries} queries", '
+            f"serialize;dur={self.serialize_time * 1000:.1f}")
+
+
+def get_timer():
+    """Returns the timer of the active request, or None."""
+    return ACTIVE_TIMER.get()
+
+
+def track_query(execute, sql, params, many, query_context):
+    """
+    A database execute wrapper counting and timing queries into the active request's timer.
+    Connections are shared by concurrent ASGI requests, so the timer comes from the context
+    of the query, never from the connection.
+    """
+    timer = ACTIVE_TIMER.get()
+    if timer is None:
+        return execute(sql, params, many, query_context)
+    started = time.perf_counter()
+    try:
+        return execute(sql, params, many, query_context)
+    finally:
+        timer.queries += 1
+        timer.db_time += time.perf_counter() - started
+
+
+def install_query_tracking(connection, **kwargs):
+    """Adds `track_query` to a connection once, also used as the connection_created receiver."""
+    if track_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(track_query)
+
+
+def start_serialize():
+    """Returns the span to pass to `add_serialize_time`, None outside a timed request."""
+    timer = get_timer()
+    if timer is None:
+        return None
+    return timer, time.perf_counter(), timer.db_time
+
+
+def add_serialize_time(span):
+    if span is None:
+        return
+    timer, started, db_time = span
+    # lazy querysets run their queries while serializing, those count as db time
+    timer.serialize_time += time.perf_counter() - started - (timer.db_time - db_time)
+
+
+def observe(key, timer, size=None):
+    with LOCK:
+        stats = ROUTE_STATS.get(key)
+        if stats is None:
+            stats = ROUTE_STATS[key] = RouteStats()
+        stats.observe(timer, size)
+
+
+def get_stats():
+    """Returns {route key: histogram dicts} for every route seen by this process."""
+    with LOCK:
+        return {key: stats.to_dict() for key, stats in ROUTE_STATS.items()}
+
+
+def reset_stats():
+    with LOCK:
+        ROUTE_STATS.clear()
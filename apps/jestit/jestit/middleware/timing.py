@@ -0,0 +1,72 @@
+from django.db import connections
+from django.db.backends.signals import connection_created
+from django.utils.deprecation import MiddlewareMixin
+from jestit.helpers.settings import settings
+from jestit.helpers import timing
+from jestit.helpers import logit
+
+logger = logit.get_logger("timing", "timing.log")
+
+# add the Server-Timing header to responses
+TIMING_HEADER = settings.get("JESTIT_TIMING_HEADER", True)
+# log requests slower than this many milliseconds, 0 disables
+SLOW_MS = settings.get("JESTIT_TIMING_SLOW_MS", 0)
+
+
+class RequestTimingMiddleware(MiddlewareMixin):
+    """
+    Times every request: wall time, database query count and time, graph serialization
+    time and response size. Results go to the Server-Timing header and to the in-process
+    histograms of the route (see `timing.get_stats()`).
+    """
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        for connection in connections.all():
+            timing.install_query_tracking(connection)
+        token = self.start(request)
+        try:
+            response = self.get_response(request)
+        finally:
+            timing.ACTIVE_TIMER.reset(token)
+        return self.finish(request, response)
+
+    async def __acall__(self, request):
+        # queries run in sync_to_async threads, which get a copy of this context and its timer
+        token = self.start(request)
+        try:
+            response = await self.get_response(request)
+        finally:
+            timing.ACTIVE_TIMER.reset(token)
+        return self.finish(request, response)
+
+    def start(self, request):
+        request.timer = timing.RequestTimer()
+        return timing.ACTIVE_TIMER.set(request.timer)
+
+    def finish(self, request, response):
+        timer = request.timer
+        timer.stop()
+        size = None if response.streaming else len(response.content)
+        key = timer.key or self.get_route_key(request)
+        timing.observe(key, timer, size)
+        if TIMING_HEADER:
+            response["Server-Timing"] = timer.get_server_timing()
+        if SLOW_MS and timer.total * 1000 >= SLOW_MS:
+            logger.warning("slow request", dict(
+                key=key, path=request.path, total_ms=round(timer.total * 1000, 1),
+                queries=timer.queries, db_ms=round(timer.db_time * 1000, 1),
+                serialize_ms=round(timer.serialize_time * 1000, 1), size=size))
+        return response
+
+    def get_route_key(self, request):
+        # the url pattern, never the raw path, so ids do not create a key per object
+        match = getattr(request, "resolver_match", None)
+        if match is not None and match.route:
+            return f"{request.method} {match.route}"
+        return "unmatched"
+
+
+# connections are per thread, every new one (ie in the sync_to_async threads) gets the wrapper
+connection_created.connect(timing.install_query_tracking, dispatch_uid="jestit_timing")
@@ -0,0 +1,31 @@
+# Generated by Django 5.2.18 on 2026-10-18 07:19
+
+import django.utils.timezone
+import jestit.models.base
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='JestitLog',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created', models.DateTimeField(db_index=True, default=django.utils.timezone.now, editable=False)),
+                ('kind', models.CharField(default=None, max_length=200, null=True)),
+                ('path', models.TextField(db_index=True, default=None, null=True)),
+                ('ip', models.CharField(db_index=True, default=None, max_length=32, null=True)),
+                ('uid', models.IntegerField(db_index=True, default=0)),
+                ('log', models.TextField(default=None, null=True)),
+                ('model_name', models.TextField(db_index=True, default=None, null=True)),
+                ('model_id', models.IntegerField(db_index=True, default=0)),
+            ],
+            bases=(models.Model, jestit.models.base.JestitBase),
+        ),
+    ]
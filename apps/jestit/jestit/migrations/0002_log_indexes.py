@@ -0,0 +1,46 @@
+# Generated by Django 5.2.18 on 2026-10-18 07:21
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('jestit', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='jestitlog',
+            name='ip',
+            field=models.CharField(default=None, max_length=32, null=True),
+        ),
+        migrations.AlterField(
+            model_name='jestitlog',
+            name='model_id',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AlterField(
+            model_name='jestitlog',
+            name='model_name',
+            field=models.TextField(default=None, null=True),
+        ),
+        migrations.AlterField(
+            model_name='jestitlog',
+            name='path',
+            field=models.TextField(default=None, null=True),
+        ),
+        migrations.AlterField(
+            model_name='jestitlog',
+            name='uid',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AddIndex(
+            model_name='jestitlog',
+            index=models.Index(fields=['model_name', 'model_id'], name='jestitlog_model_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='jestitlog',
+            index=models.Index(fields=['uid', 'created'], name='jestitlog_uid_created_idx'),
+        ),
+    ]
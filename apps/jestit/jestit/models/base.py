@@ -1,14 +1,55 @@
 from django.http import JsonResponse
 from jestit.serializers.models import GraphSerializer
+from jestit.serializers.plans import get_graph_plan
 from django.core.exceptions import ObjectDoesNotExist
 from django.db import transaction
+from django.db import models as dm
+from django.db.models import Q
+from django.utils import timezone
+from asgiref.sync import sync_to_async
+import base64
+import copy
+import ujson
 import objict
+from jestit import errors as jerrors
 from jestit.helpers import logit
 from jestit.helpers import modules
+from jestit.helpers import counts
+from jestit.helpers import cache
+from jestit.helpers import perms as jperms
+from jestit.helpers import context
+from jestit.helpers.settings import settings
+from jestit.helpers.request import BULK_KEY
 from jestit.decorators import http as dec_http
 
 logger = logit.get_logger("debug", "debug.log")
-ACTIVE_REQUEST = None
+BULK_MAX_ROWS = settings.get("JESTIT_BULK_MAX_ROWS", 1000)
+BULK_BATCH_SIZE = settings.get("JESTIT_BULK_BATCH_SIZE", 1000)
+
+
+def __getattr__(name):
+    # ACTIVE_REQUEST used to be a module global, keep reads working
+    if name == "ACTIVE_REQUEST":
+        return context.get_request()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def encode_cursor(value, pk):
+    """Encodes a (sort value, pk) pair into an opaque url safe cursor."""
+    if hasattr(value, "isoformat"):
+        value = value.isoformat()
+    elif value is not None and not isinstance(value, (int, float, str, bool)):
+        value = str(value)
+    return base64.urlsafe_b64encode(ujson.dumps([value, pk]).encode("utf-8")).decode("utf-8")
+
+
+def decode_cursor(cursor):
+    """Decodes a cursor created by `encode_cursor` back into (sort value, pk)."""
+    try:
+        value, pk = ujson.loads(base64.urlsafe_b64decode(cursor.encode("utf-8")))
+        return value, pk
+    except Exception:
+        raise jerrors.RestErrorException("invalid cursor", 400, 400)
 
 class JestitBase:
     """
@@ -17,7 +58,7 @@ class JestitBase:
 
     @property
     def active_request(self):
-        return ACTIVE_REQUEST
+        return context.get_request()
 
     @classmethod
     def get_rest_meta_prop(cls, name, default=None):
@@ -31,6 +72,17 @@ class JestitBase:
             return default
         return getattr(cls.RestMeta, name, default)
 
+    @classmethod
+    def get_rest_perms(cls, names):
+        """
+        Returns the compiled frozenset of the first RestMeta *_PERMS in `names` that is set,
+        `names` is a name or a list/tuple of names.
+        """
+        try:
+            return cls.__rest_perms__[names]
+        except (AttributeError, KeyError, TypeError):
+            return jperms.resolve_rest_perms(cls, names)
+
     @classmethod
     def rest_error_response(cls, request, status=500, **kwargs):
         payload = dict(kwargs)
@@ -46,7 +98,11 @@ class JestitBase:
         """
         cls.__rest_field_names__ = [f.name for f in cls._meta.get_fields()]
         if pk:
-            instance = cls.get_instance_or_404(pk)
+            queryset = None
+            if request.method == 'GET':
+                queryset = cls.on_rest_graph_queryset(
+                    cls.objects.all(), request.GET.get("graph", "default"), defer=False)
+            instance = cls.get_instance_or_404(pk, queryset)
             if isinstance(instance, dict):  # If it's a response, return early
                 return instance
 
@@ -64,10 +120,50 @@ class JestitBase:
         return cls.rest_error_response(request, 500, error=f"{cls.__name__} not found")
 
     @classmethod
-    def get_instance_or_404(cls, pk):
+    async def on_rest_arequest(cls, request, pk=None):
+        """
+        Async `on_rest_request` for coroutine views served under ASGI.
+        Reads (get and list) run on the async ORM in the event loop, writes run the sync
+        handlers in a worker thread since Django transactions are sync only.
+        """
+        cls.__rest_field_names__ = [f.name for f in cls._meta.get_fields()]
+        if not pk:
+            return await cls.on_handle_alist_or_create(request)
+        queryset = None
+        if request.method == 'GET':
+            queryset = cls.on_rest_graph_queryset(
+                cls.objects.all(), request.GET.get("graph", "default"), defer=False)
+        instance = await cls.aget_instance_or_404(pk, queryset)
+        if isinstance(instance, dict):  # If it's a response, return early
+            return instance
+
+        if request.method == 'GET':
+            return await cls.on_rest_handle_aget(request, instance)
+
+        elif request.method in ['POST', 'PUT']:
+            return await cls.on_rest_handle_asave(request, instance)
+
+        elif request.method == 'DELETE':
+            return await cls.on_rest_handle_adelete(request, instance)
+
+        return cls.rest_error_response(request, 500, error=f"{cls.__name__} not found")
+
+    @classmethod
+    def get_instance_or_404(cls, pk, queryset=None):
         """Helper method to get an instance or return a 404 response."""
+        if queryset is None:
+            queryset = cls.objects
         try:
-            return cls.objects.get(pk=pk)
+            return queryset.get(pk=pk)
+        except ObjectDoesNotExist:
+            return cls.rest_error_response(None, 404, error=f"{cls.__name__} not found")
+
+    @classmethod
+    async def aget_instance_or_404(cls, pk, queryset=None):
+        if queryset is None:
+            queryset = cls.objects
+        try:
+            return await queryset.aget(pk=pk)
         except ObjectDoesNotExist:
             return cls.rest_error_response(None, 404, error=f"{cls.__name__} not found")
 
@@ -76,8 +172,8 @@ class JestitBase:
         """
         Checks permissions using instance-level `has_permission` if available, otherwise falls back to `cls.rest_check_permission`.
         """
-        perms = cls.get_rest_meta_prop(permission_keys, [])
-        if perms is None or len(perms) == 0:
+        perms = cls.get_rest_perms(permission_keys)
+        if not perms:
             return True
         if "all" not in perms:
             if request.user is None or not request.user.is_authenticated:
@@ -94,6 +190,22 @@ class JestitBase:
             return request.group.member_has_permission(request.user, perms)
         return request.user.has_permission(perms)
 
+    @classmethod
+    async def arest_check_permission(cls, request, permission_keys, instance=None):
+        """
+        Async `rest_check_permission`. The user's permissions are checked in the event loop,
+        instance and group checks may query so they run `rest_check_permission` in a thread.
+        """
+        perms = cls.get_rest_perms(permission_keys)
+        if not perms:
+            return True
+        if "all" not in perms:
+            if request.user is None or not request.user.is_authenticated:
+                return False
+        if instance is not None or (request.group and hasattr(cls, "group")):
+            return await sync_to_async(cls.rest_check_permission)(request, permission_keys, instance)
+        return request.user.has_permission(perms)
+
     @classmethod
     def on_rest_handle_get(cls, request, instance):
         """Handles GET requests with permission checks."""
@@ -104,7 +216,7 @@ class JestitBase:
     @classmethod
     def on_rest_handle_save(cls, request, instance):
         """Handles POST and PUT requests with permission checks."""
-        if cls.rest_check_permission(request, ["SAVE_PERMS", "VIEW_PERMS"], instance):
+        if cls.rest_check_permission(request, jperms.SAVE_KEYS, instance):
             return instance.on_rest_save(request)
         return cls.rest_error_response(request, 403, error=f"{request.method} permission denied: {cls.__name__}")
 
@@ -114,7 +226,7 @@ class JestitBase:
         if not cls.get_rest_meta_prop("CAN_DELETE", False):
             return cls.rest_error_response(request, 403, error=f"DELETE not allowed: {cls.__name__}")
 
-        if cls.rest_check_permission(request, ["DELETE_PERMS", "SAVE_PERMS", "VIEW_PERMS"], instance):
+        if cls.rest_check_permission(request, jperms.DELETE_KEYS, instance):
             return instance.on_rest_delete(request)
         return cls.rest_error_response(request, 403, error=f"DELETE permission denied: {cls.__name__}")
 
@@ -126,24 +238,265 @@ class JestitBase:
 
     @classmethod
     def on_rest_handle_create(cls, request):
-        if cls.rest_check_permission(request, ["SAVE_PERMS", "VIEW_PERMS"]):
+        if cls.rest_check_permission(request, jperms.SAVE_KEYS):
             instance = cls()
             return instance.on_rest_save(request)
         return cls.rest_error_response(request, 403, error=f"CREATE permission denied: {cls.__name__}")
 
     @classmethod
     def on_handle_list_or_create(cls, request):
-        """Handles listing (GET without pk) and creating (POST/PUT without pk)."""
+        """
+        Handles listing (GET without pk) and creating (POST/PUT without pk).
+        A JSON list body turns POST/PUT into a bulk save and DELETE into a bulk delete.
+        """
+        bulk = request.DATA.get(BULK_KEY, None)
         if request.method == 'GET':
             return cls.on_rest_handle_list(request)
         elif request.method in ['POST', 'PUT']:
+            if bulk is not None:
+                return cls.on_rest_handle_bulk_save(request, bulk)
             return cls.on_rest_handle_create(request)
+        elif request.method == 'DELETE' and bulk is not None:
+            return cls.on_rest_handle_bulk_delete(request, bulk)
+        return cls.rest_error_response(request, 405, error=f"{request.method} not allowed: {cls.__name__}")
+
+    @classmethod
+    async def on_rest_handle_aget(cls, request, instance):
+        if await cls.arest_check_permission(request, "VIEW_PERMS", instance):
+            return await instance.on_rest_aget(request)
+        return cls.rest_error_response(request, 403, error=f"GET permission denied: {cls.__name__}")
+
+    @classmethod
+    async def on_rest_handle_asave(cls, request, instance):
+        if await cls.arest_check_permission(request, jperms.SAVE_KEYS, instance):
+            return await instance.on_rest_asave(request)
+        return cls.rest_error_response(request, 403, error=f"{request.method} permission denied: {cls.__name__}")
+
+    @classmethod
+    async def on_rest_handle_adelete(cls, request, instance):
+        if not cls.get_rest_meta_prop("CAN_DELETE", False):
+            return cls.rest_error_response(request, 403, error=f"DELETE not allowed: {cls.__name__}")
+
+        if await cls.arest_check_permission(request, jperms.DELETE_KEYS, instance):
+            return await instance.on_rest_adelete(request)
+        return cls.rest_error_response(request, 403, error=f"DELETE permission denied: {cls.__name__}")
+
+    @classmethod
+    async def on_rest_handle_alist(cls, request):
+        if await cls.arest_check_permission(request, "VIEW_PERMS"):
+            return await cls.on_rest_alist(request)
+        return cls.rest_error_response(request, 403, error=f"GET permission denied: {cls.__name__}")
+
+    @classmethod
+    async def on_handle_alist_or_create(cls, request):
+        if request.method == 'GET':
+            return await cls.on_rest_handle_alist(request)
+        # creates and bulk requests write inside transactions, run them in a thread
+        return await sync_to_async(cls.on_handle_list_or_create)(request)
+
+    @classmethod
+    def on_rest_handle_bulk_save(cls, request, items):
+        """
+        Creates (rows without an id) and updates (rows with an id) many instances in one transaction.
+        Related pks are resolved with one `in_bulk` per relation, permissions are checked per row
+        and rows that fail are reported in place without stopping the rest.
+        """
+        if not cls.rest_check_permission(request, jperms.SAVE_KEYS):
+            return cls.rest_error_response(request, 403, error=f"{request.method} permission denied: {cls.__name__}")
+        if len(items) > BULK_MAX_ROWS:
+            return cls.rest_error_response(request, 400, error=f"bulk requests are limited to {BULK_MAX_ROWS} rows")
+        pk_field = cls._meta.pk
+        queryset = cls.on_rest_bulk_queryset(request)
+        pks = [pk_field.to_python(item["id"]) for item in items if isinstance(item, dict) and item.get("id", None) is not None]
+        existing = queryset.in_bulk(pks) if pks else {}
+        related = cls.get_bulk_related_instances(items)
+
+        created, updated, results = [], [], []
+        update_fields = set()
+        unchanged = 0
+        for item in items:
+            if not isinstance(item, dict):
+                results.append(dict(error="invalid row", code=400))
+                continue
+            try:
+                if item.get("id", None) is not None:
+                    instance = existing.get(pk_field.to_python(item["id"]), None)
+                    if instance is None:
+                        raise jerrors.RestErrorException(f"{cls.__name__} not found", 404, 404)
+                    if not cls.rest_check_permission(request, jperms.SAVE_KEYS, instance):
+                        raise jerrors.PermissionDeniedException()
+                    snapshot = instance.get_rest_snapshot()
+                    instance.on_rest_save_data(request, objict.objict.fromdict(item), related)
+                    changed = instance.get_rest_changed_fields(snapshot)
+                    if changed:
+                        update_fields.update(changed)
+                        updated.append(instance)
+                    else:
+                        unchanged += 1
+                else:
+                    instance = cls()
+                    instance.on_rest_save_data(request, objict.objict.fromdict(item), related)
+                    # same instance rules (on_rest_check_permission, owner) as updated rows
+                    if not cls.rest_check_permission(request, jperms.SAVE_KEYS, instance):
+                        raise jerrors.PermissionDeniedException()
+                    created.append(instance)
+                results.append(instance)
+            except jerrors.JestitException as err:
+                results.append(dict(error=err.reason, code=err.code))
+            except (ValueError, TypeError, ObjectDoesNotExist) as err:
+                results.append(dict(error=str(err), code=400))
+
+        with transaction.atomic():
+            cls.on_rest_bulk_write(created, updated, update_fields)
+        counts.invalidate(cls)
+        data = [dict(id=row.pk) if isinstance(row, JestitBase) else row for row in results]
+        return JsonResponse(dict(
+            status=True, data=data, size=len(items), created=len(created), updated=len(updated),
+            unchanged=unchanged, errors=len(items) - len(created) - len(updated) - unchanged))
+
+    @classmethod
+    def on_rest_bulk_queryset(cls, request):
+        queryset = cls.objects.all()
+        if request.group is not None and hasattr(cls, "group"):
+            queryset = queryset.filter(group=request.group)
+        return queryset
+
+    @classmethod
+    def get_bulk_related_instances(cls, items):
+        """
+        Returns {field name: {pk: instance}} for every forward relation referenced by the rows,
+        loaded with a single `in_bulk` per relation.
+        """
+        related = {}
+        for field in cls._meta.get_fields():
+            if not (field.is_relation and field.concrete and field.related_model is not None):
+                continue
+            pk_field = field.related_model._meta.pk
+            values = set()
+            for item in items:
+                if isinstance(item, dict) and item.get(field.name, None) is not None:
+                    try:
+                        values.add(pk_field.to_python(item[field.name]))
+                    except Exception:
+                        continue
+            if values:
+                related[field.name] = field.related_model.objects.in_bulk(list(values))
+        return related
+
+    @classmethod
+    def on_rest_bulk_write(cls, created, updated, update_fields):
+        """
+        Writes bulk rows with `bulk_create`/`bulk_update`, models that override `save()`
+        are saved row by row so their save logic still runs.
+        """
+        if cls.save is not dm.Model.save:
+            for instance in created:
+                instance.save()
+            for instance in updated:
+                instance.save(update_fields=list(update_fields))
+            return
+        if created:
+            cls.objects.bulk_create(created, batch_size=BULK_BATCH_SIZE)
+        if updated:
+            fields = [field for field in cls._meta.concrete_fields if field.name in update_fields]
+            # bulk_update skips pre_save, so auto_now fields are bumped here
+            now = timezone.now()
+            for field in fields:
+                if getattr(field, "auto_now", False):
+                    for instance in updated:
+                        setattr(instance, field.attname, now)
+            if fields:
+                cls.objects.bulk_update(updated, [field.name for field in fields], batch_size=BULK_BATCH_SIZE)
+
+    @classmethod
+    def on_rest_handle_bulk_delete(cls, request, items):
+        """
+        Deletes the instances whose ids are listed (ids or {"id": ...} rows), checking permissions per row.
+        """
+        if not cls.get_rest_meta_prop("CAN_DELETE", False):
+            return cls.rest_error_response(request, 403, error=f"DELETE not allowed: {cls.__name__}")
+        if not cls.rest_check_permission(request, jperms.DELETE_KEYS):
+            return cls.rest_error_response(request, 403, error=f"DELETE permission denied: {cls.__name__}")
+        pk_field = cls._meta.pk
+        pks = []
+        for item in items:
+            try:
+                pks.append(pk_field.to_python(item.get("id", None) if isinstance(item, dict) else item))
+            except Exception:
+                pks.append(None)
+        existing = cls.on_rest_bulk_queryset(request).in_bulk([pk for pk in pks if pk is not None])
+        allowed, results = [], []
+        for pk in pks:
+            instance = existing.get(pk, None)
+            if instance is None:
+                results.append(dict(id=pk, error=f"{cls.__name__} not found", code=404))
+            elif not cls.rest_check_permission(request, jperms.DELETE_KEYS, instance):
+                results.append(dict(id=pk, error="Permission Denied", code=403))
+            else:
+                allowed.append(pk)
+                results.append(dict(id=pk, status="deleted"))
+        with transaction.atomic():
+            cls.objects.filter(pk__in=allowed).delete()
+        return JsonResponse(dict(status=True, data=results, size=len(items), deleted=len(allowed)))
 
     @classmethod
     def on_rest_list(cls, request, queryset=None):
         """
         Handles listing objects with filtering, sorting, and pagination.
         """
+        queryset = cls.on_rest_list_queryset(request, queryset)
+
+        # Implement pagination
+        page_size = request.DATA.get_typed("size", 10, int)
+        graph = request.DATA.get("graph", "list")
+        extra = dict(size=page_size)
+        count = counts.get_count(queryset, request.DATA.get("count", cls.get_rest_meta_prop("LIST_COUNT", "exact")))
+        if count is not None:
+            extra["count"] = count
+            if isinstance(count, counts.EstimatedCount):
+                extra["count_estimated"] = True
+        if "cursor" in request.DATA:
+            paged_queryset, extra["next"] = cls.on_rest_list_cursor(request, queryset, page_size, graph)
+        else:
+            paged_queryset = cls.on_rest_list_page(request, queryset, page_size, graph, extra)
+        serializer = GraphSerializer(paged_queryset, graph=graph, many=True)
+        if request.DATA.get_typed("stream", cls.get_rest_meta_prop("LIST_STREAM", False), bool):
+            return serializer.to_streaming_response(request, **extra)
+        return serializer.to_response(request, **extra)
+
+    @classmethod
+    async def on_rest_alist(cls, request, queryset=None):
+        """
+        Async `on_rest_list`, the count, cursor keys and rows are read with the async ORM.
+        """
+        if request.DATA.get_typed("stream", cls.get_rest_meta_prop("LIST_STREAM", False), bool):
+            # streamed rows are read by the response iterator, which is sync
+            return await sync_to_async(cls.on_rest_list)(request, queryset)
+        queryset = cls.on_rest_list_queryset(request, queryset)
+
+        page_size = request.DATA.get_typed("size", 10, int)
+        graph = request.DATA.get("graph", "list")
+        extra = dict(size=page_size)
+        count = await counts.aget_count(queryset, request.DATA.get("count", cls.get_rest_meta_prop("LIST_COUNT", "exact")))
+        if count is not None:
+            extra["count"] = count
+            if isinstance(count, counts.EstimatedCount):
+                extra["count_estimated"] = True
+        if "cursor" in request.DATA:
+            queryset, keys = cls.on_rest_list_seek(request, queryset, page_size)
+            keys = [key async for key in keys]
+            paged_queryset = cls.on_rest_graph_queryset(queryset, graph)[:page_size]
+            extra["next"] = cls.get_next_cursor(keys, page_size)
+        else:
+            paged_queryset = cls.on_rest_list_page(request, queryset, page_size, graph, extra)
+        serializer = GraphSerializer(paged_queryset, graph=graph, many=True)
+        return await serializer.ato_response(request, **extra)
+
+    @classmethod
+    def on_rest_list_queryset(cls, request, queryset=None):
+        """
+        Returns the list queryset scoped to the request group, filtered and sorted.
+        """
         if queryset is None:
             queryset = cls.objects.all()
         if request.group is not None and hasattr(cls, "group"):
@@ -151,16 +504,58 @@ class JestitBase:
                 del request.DATA["group"]
             queryset = queryset.filter(group=request.group)
         queryset = cls.on_rest_list_filter(request, queryset)
-        queryset = cls.on_rest_list_sort(request, queryset)
+        return cls.on_rest_list_sort(request, queryset)
 
-        # Implement pagination
-        page_size = request.DATA.get_typed("size", 10, int)
+    @classmethod
+    def on_rest_list_page(cls, request, queryset, page_size, graph, extra):
+        """Offset pagination from `start`."""
         page_start = request.DATA.get_typed("start", 0, int)
         page_end = page_start+page_size
-        paged_queryset = queryset[page_start:page_end]
-        graph = request.DATA.get("graph", "list")
-        serializer = GraphSerializer(paged_queryset, graph=graph, many=True)
-        return serializer.to_response(request, count=queryset.count(), page=page_start, size=page_size)
+        extra["page"] = page_start
+        return cls.on_rest_graph_queryset(queryset, graph)[page_start:page_end]
+
+    @classmethod
+    def on_rest_list_cursor(cls, request, queryset, page_size, graph):
+        """
+        Keyset pagination, seeks past the opaque `cursor` using the sort field plus the pk
+        as a tie-breaker so every page costs the same no matter how deep it is.
+        Returns the page queryset and the cursor for the next page (None on the last page).
+        """
+        queryset, keys = cls.on_rest_list_seek(request, queryset, page_size)
+        next_cursor = cls.get_next_cursor(list(keys), page_size)
+        return cls.on_rest_graph_queryset(queryset, graph)[:page_size], next_cursor
+
+    @classmethod
+    def on_rest_list_seek(cls, request, queryset, page_size):
+        """
+        Returns the queryset ordered and filtered past the cursor, plus the (sort value, pk)
+        keys queryset of the page and one extra row to know if there is a next page.
+        """
+        order_by = queryset.query.order_by
+        sort_field = order_by[0] if order_by and isinstance(order_by[0], str) else "-id"
+        name = sort_field.lstrip("-")
+        desc = sort_field.startswith("-")
+        op = "lt" if desc else "gt"
+        is_pk = name in ("pk", cls._meta.pk.name)
+        if not is_pk and cls._meta.get_field(name).null:
+            raise jerrors.RestErrorException(f"cursor pagination requires a non null sort field: {name}", 400, 400)
+        if is_pk:
+            queryset = queryset.order_by(sort_field)
+        else:
+            queryset = queryset.order_by(sort_field, "-pk" if desc else "pk")
+
+        cursor = request.DATA.get("cursor", None)
+        if cursor:
+            value, pk = decode_cursor(cursor)
+            if is_pk:
+                queryset = queryset.filter(**{f"pk__{op}": pk})
+            else:
+                queryset = queryset.filter(Q(**{f"{name}__{op}": value}) | Q(**{name: value, f"pk__{op}": pk}))
+        return queryset, queryset.values_list(name, "pk")[:page_size+1]
+
+    @staticmethod
+    def get_next_cursor(keys, page_size):
+        return encode_cursor(*keys[page_size-1]) if len(keys) > page_size else None
 
     @classmethod
     def on_rest_list_filter(cls, request, queryset):
@@ -180,6 +575,20 @@ class JestitBase:
         return queryset.filter(**filters)
 
 
+    @classmethod
+    def on_rest_graph_queryset(cls, queryset, graph, defer=True):
+        """
+        Applies the joins (and with `defer` the column list) the requested graph needs,
+        so nested graphs are loaded in the same query instead of one query per row.
+        """
+        plan = get_graph_plan(cls, graph)
+        related = plan.get_select_related()
+        if related:
+            queryset = queryset.select_related(*related)
+        if defer:
+            queryset = queryset.only(*plan.get_only_fields())
+        return queryset
+
     @classmethod
     def on_rest_list_sort(cls, request, queryset):
         """
@@ -201,13 +610,76 @@ class JestitBase:
         """
         graph = request.GET.get("graph", "default")
         serializer = GraphSerializer(self, graph=graph)
+        if cache.GET_CACHE is not None and self.get_rest_meta_prop("GET_CACHE", True):
+            return serializer.to_cached_response(request, cache.GET_CACHE)
         return serializer.to_response(request)
 
+    async def on_rest_aget(self, request):
+        """
+        Async `on_rest_get`, the instance was loaded with the joins of its graph so
+        serializing only queries when the graph has extras or recursive relations.
+        """
+        plan = get_graph_plan(self.__class__, request.GET.get("graph", "default"))
+        if plan.is_async_safe:
+            return self.on_rest_get(request)
+        return await sync_to_async(self.on_rest_get)(request)
+
     def on_rest_save(self, request):
         """
         Creates a model instance from a dictionary.
         """
-        data_dict = request.DATA
+        snapshot = None if self._state.adding else self.get_rest_snapshot()
+        self.on_rest_save_data(request, request.DATA)
+        if snapshot is None:
+            self.atomic_save()
+        else:
+            changed = self.get_rest_changed_fields(snapshot)
+            # nothing changed, skip the write (and the modified bump)
+            if changed:
+                self.atomic_save(update_fields=changed)
+        return self.on_rest_get(request)
+
+    async def on_rest_asave(self, request):
+        # saves run in a transaction, which Django only supports from sync code
+        return await sync_to_async(self.on_rest_save)(request)
+
+    def get_rest_snapshot(self):
+        """
+        Returns {attname: value} for the loaded concrete fields,
+        JSON values are copied so in place edits are detected.
+        """
+        deferred = self.get_deferred_fields()
+        snapshot = {}
+        for field in self._meta.concrete_fields:
+            if field.attname in deferred:
+                continue
+            value = getattr(self, field.attname)
+            if isinstance(value, (dict, list)):
+                value = copy.deepcopy(value)
+            snapshot[field.attname] = value
+        return snapshot
+
+    def get_rest_changed_fields(self, snapshot):
+        """
+        Returns the names of the fields that differ from `snapshot`, plus any auto_now
+        fields when something changed, ready to pass as `update_fields`.
+        """
+        changed = []
+        auto_now = []
+        for field in self._meta.concrete_fields:
+            if getattr(field, "auto_now", False):
+                auto_now.append(field.name)
+            elif field.attname in snapshot and getattr(self, field.attname) != snapshot[field.attname]:
+                changed.append(field.name)
+        if changed:
+            changed.extend(auto_now)
+        return changed
+
+    def on_rest_save_data(self, request, data_dict, related_instances=None):
+        """
+        Applies the fields in `data_dict` to the instance without saving it.
+        `related_instances` maps relation names to preloaded {pk: instance} dicts (see bulk saves).
+        """
         for field in self._meta.get_fields():
             field_name = field.name
             if field_name in data_dict:
@@ -217,6 +689,15 @@ class JestitBase:
                     set_field_method(field_value, request)
                 elif field.is_relation and hasattr(field, 'related_model'):
                     related_model = field.related_model
+                    if related_instances is not None and field_name in related_instances:
+                        try:
+                            related_instance = related_instances[field_name].get(
+                                related_model._meta.pk.to_python(field_value), None)
+                        except Exception:
+                            related_instance = None
+                        if related_instance is not None:
+                            setattr(self, field_name, related_instance)
+                        continue
                     try:
                         related_instance = related_model.objects.get(pk=field_value)
                         setattr(self, field_name, related_instance)
@@ -231,8 +712,6 @@ class JestitBase:
                         setattr(self, field_name, merged_value)
                 else:
                     setattr(self, field_name, field_value)
-        self.atomic_save()
-        return self.on_rest_get(request)
 
     def on_rest_delete(self, request):
         """
@@ -245,6 +724,16 @@ class JestitBase:
         except Exception as e:
             return JsonResponse({"error": str(e)}, status=400)
 
-    def atomic_save(self):
+    async def on_rest_adelete(self, request):
+        """
+        Async `on_rest_delete`, `adelete` runs the collector (and its transaction) in a thread.
+        """
+        try:
+            await self.adelete()
+            return JsonResponse({"status": "deleted"}, status=204)
+        except Exception as e:
+            return JsonResponse({"error": str(e)}, status=400)
+
+    def atomic_save(self, **kwargs):
         with transaction.atomic():
-            self.save()
+            self.save(**kwargs)
@@ -1,13 +1,59 @@
 from .base import JestitBase
+import datetime
 from django.db import models as dm
+from django.utils import timezone
+from jestit.helpers import batchwriter
+from jestit.helpers import retention
+from jestit.helpers.settings import settings
+
+# days rows are kept before `archive` moves them to VAR_ROOT/archive
+RETENTION_DAYS = settings.get("JESTIT_LOG_RETENTION_DAYS", 90)
 
 
 class JestitLog(dm.Model, JestitBase):
-    created = dm.DateTimeField(auto_now_add=True, db_index=True)
+    # a default instead of auto_now_add so batched rows keep the time they were recorded
+    created = dm.DateTimeField(default=timezone.now, editable=False, db_index=True)
     kind = dm.CharField(max_length=200, default=None, null=True)
-    path = dm.TextField(default=None, null=True, db_index=True)
-    ip = dm.CharField(max_length=32, default=None, null=True, db_index=True)
-    uid = dm.IntegerField(default=0, db_index=True)
+    path = dm.TextField(default=None, null=True)
+    ip = dm.CharField(max_length=32, default=None, null=True)
+    uid = dm.IntegerField(default=0)
     log = dm.TextField(default=None, null=True)
-    model_name = dm.TextField(default=None, null=True, db_index=True)
-    model_id = dm.IntegerField(default=0, db_index=True)
+    model_name = dm.TextField(default=None, null=True)
+    model_id = dm.IntegerField(default=0)
+
+    class Meta:
+        # logs are read per instance history and per user timeline, every other
+        # index only slows down the inserts
+        indexes = [
+            dm.Index(fields=["model_name", "model_id"], name="jestitlog_model_idx"),
+            dm.Index(fields=["uid", "created"], name="jestitlog_uid_created_idx"),
+        ]
+
+    @classmethod
+    def record(cls, kind=None, log=None, request=None, path=None, ip=None, uid=None, model_name=None, model_id=0):
+        """
+        Queues a log row for the batch writer, nothing is written on the calling thread.
+        `request` fills in the path, ip and user id when they are not given.
+        """
+        if request is not None:
+            if path is None:
+                path = request.path
+            if ip is None:
+                ip = request.META.get("REMOTE_ADDR", None)
+            if uid is None:
+                user = getattr(request, "user", None)
+                if user is not None and user.is_authenticated:
+                    uid = user.id
+        batchwriter.get_writer(cls).add(dict(
+            created=timezone.now(), kind=kind, log=log, path=path, ip=ip,
+            uid=uid or 0, model_name=model_name, model_id=model_id or 0))
+
+    @classmethod
+    def archive(cls, days=None, folder=None):
+        """
+        Moves rows older than `days` (JESTIT_LOG_RETENTION_DAYS) to compressed JSON lines
+        files under VAR_ROOT/archive and deletes them. Returns the number of rows archived.
+        """
+        days = RETENTION_DAYS if days is None else days
+        cutoff = timezone.now() - datetime.timedelta(days=days)
+        return retention.archive_rows(cls, cutoff, folder)
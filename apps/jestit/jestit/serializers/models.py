@@ -1,12 +1,17 @@
 import ujson
-from django.db.models import ForeignKey, OneToOneField
+import hashlib
+from asgiref.sync import sync_to_async
 from django.db.models.query import QuerySet
-from django.http import HttpResponse
-from datetime import datetime
+from django.http import HttpResponse, HttpResponseNotModified, StreamingHttpResponse
+from django.utils.http import http_date, parse_http_date_safe
 
 from jestit.helpers import logit
+from jestit.helpers import timing
+from jestit.helpers.settings import settings
+from jestit.serializers.plans import get_graph_plan
 
 logger = logit.get_logger("serializer", "serializer.log")
+STREAM_CHUNK_SIZE = settings.get("JESTIT_STREAM_CHUNK_SIZE", 1000)
 
 class GraphSerializer:
     """
@@ -14,19 +19,22 @@ class GraphSerializer:
     Supports nested relationships and different serialization graphs.
     """
 
-    def __init__(self, instance, graph="default", many=False):
+    def __init__(self, instance, graph="default", many=False, values=None):
         """
         :param instance: Model instance or QuerySet.
         :param graph: The graph type to use (e.g., "default", "list").
         :param many: Boolean, if `True`, serializes a QuerySet.
+        :param values: Use `.values_list()` rows instead of model instances for flat graphs,
+                       `None` picks it automatically, `False` always loads instances.
         """
         self.graph = graph
         self.qset = None
+        self.values = values
         # If it's a QuerySet, mark `many=True`
         if isinstance(instance, QuerySet):
             self.many = True
             self.qset = instance
-            self.instance = list(instance)  # Convert QuerySet to list for iteration
+            self.instance = instance  # evaluated lazily so flat graphs can use values_list
         else:
             self.many = many
             self.instance = instance
@@ -36,80 +44,68 @@ class GraphSerializer:
         Serializes a single model instance or a QuerySet.
         """
         if self.many:
+            if self.qset is not None:
+                plan = get_graph_plan(self.qset.model, self.graph)
+                self.graph = plan.graph
+                if self.values is not False and plan.is_flat:
+                    return plan.serialize_values(self.qset)
+                return [plan.serialize(obj) for obj in self.qset]
             return [self._serialize_instance(obj) for obj in self.instance]
         return self._serialize_instance(self.instance)
 
-    def _serialize_instance(self, obj):
+    async def aserialize(self):
         """
-        Serializes a single model instance based on `RestMeta.GRAPHS`.
+        Async `serialize`, QuerySets are read with async iteration. Graphs that could
+        query while serializing (extras or recursive relations) are serialized in a thread.
         """
-        if not hasattr(obj, "RestMeta") or not hasattr(obj.RestMeta, "GRAPHS"):
-            logger.warning("RestMeta not found")
-            return self._model_to_dict_custom(obj, fields=[field.name for field in obj._meta.fields])
-
-        graph_config = obj.RestMeta.GRAPHS.get(self.graph)
-        if graph_config is None and self.graph != "default":
-            self.graph = "default"
-            graph_config = obj.RestMeta.GRAPHS.get(self.graph)
+        if self.qset is None:
+            if not self.many and get_graph_plan(self.instance.__class__, self.graph).is_async_safe:
+                return self.serialize()
+            return await sync_to_async(self.serialize)()
+        plan = get_graph_plan(self.qset.model, self.graph)
+        self.graph = plan.graph
+        if self.values is not False and plan.is_flat:
+            return await plan.aserialize_values(self.qset)
+        if not plan.is_async_safe:
+            return await sync_to_async(self.serialize)()
+        return [plan.serialize(obj) async for obj in self.qset]
+
+    def iter_serialize(self, chunk_size=STREAM_CHUNK_SIZE):
+        """
+        Returns a generator of serialized rows that reads the QuerySet in chunks
+        instead of loading the full result into memory.
+        """
+        if self.qset is None:
+            return (self._serialize_instance(obj) for obj in self.instance)
+        plan = get_graph_plan(self.qset.model, self.graph)
+        self.graph = plan.graph
+        if self.values is not False and plan.is_flat:
+            return plan.iter_values(self.qset, chunk_size)
+        return (plan.serialize(obj) for obj in self.qset.iterator(chunk_size=chunk_size))
 
-        # If graph is not defined or None, assume all fields should be included
-        if graph_config is None:
-            logger.warning(f"graph '{self.graph}' not found for {obj.__class__.__name__}")
-            return self._model_to_dict_custom(obj, fields=[field.name for field in obj._meta.fields])
-        else:
-            logger.info(self.graph, graph_config)
-        data = self._model_to_dict_custom(obj, fields=graph_config.get("fields", None))  # Convert normal fields
-
-        # Process extra fields (methods, metadata, etc.)
-        extra_fields = graph_config.get("extra", [])
-        for field in extra_fields:
-            if isinstance(field, tuple):  # Handle renamed method serialization
-                method_name, alias = field
-            else:
-                method_name, alias = field, field
-            if hasattr(obj, method_name):
-                attr = getattr(obj, method_name)
-                data[alias] = attr() if callable(attr) else attr
-
-        # Process related model graphs (ForeignKeys, OneToOneFields)
-        related_graphs = graph_config.get("graphs", {})
-        for related_field, sub_graph in related_graphs.items():
-            related_obj = getattr(obj, related_field, None)
-            if related_obj is not None:
-                # Determine if the field is a ForeignKey or OneToOneField
-                field_obj = obj._meta.get_field(related_field)
-                if isinstance(field_obj, (ForeignKey, OneToOneField)):
-                    # Serialize related model using its corresponding graph
-                    logger.warning(f"graph '{sub_graph}' for {related_obj.__class__.__name__}")
-                    data[related_field] = GraphSerializer(related_obj, graph=sub_graph).serialize()
-
-        return data
-
-    def _model_to_dict_custom(self, obj, fields=None):
-        """
-        Custom serialization method for Django model instances.
-        """
-        data = {}
-        for field in obj._meta.fields:
-            # logger.info(field, type(field), isinstance(field, (ForeignKey, OneToOneField)))
-            if fields and field.name not in fields:
-                continue
-
-            field_value = getattr(obj, field.name)
-
-            # Handle DateTimeField serialization to epoch
-            if isinstance(field_value, datetime):
-                data[field.name] = int(field_value.timestamp())
-            elif field_value is not None and isinstance(field, (ForeignKey, OneToOneField)):
-                data[field.name] = field_value.id
-            else:
-                data[field.name] = field_value
-        # logger.info(data)
-        return data
+    def _serialize_instance(self, obj):
+        """
+        Serializes a single model instance using the compiled plan for `RestMeta.GRAPHS`.
+        """
+        plan = get_graph_plan(obj.__class__, self.graph)
+        self.graph = plan.graph
+        return plan.serialize(obj)
 
     def to_json(self, **kwargs):
         """Returns JSON output of the serialized data."""
-        data = self.serialize()
+        span = timing.start_serialize()
+        out = self.encode(self.serialize(), **kwargs)
+        timing.add_serialize_time(span)
+        return out
+
+    async def ato_json(self, **kwargs):
+        span = timing.start_serialize()
+        out = self.encode(await self.aserialize(), **kwargs)
+        timing.add_serialize_time(span)
+        return out
+
+    def encode(self, data, **kwargs):
+        """Wraps the serialized data in the response envelope and encodes it."""
         if self.many:
             data = dict(data=data, status=True,
                 size=len(data), graph=self.graph)
@@ -121,15 +117,96 @@ class GraphSerializer:
         # logger.info("RAW", out)
         return out
 
+    def to_json_stream(self, chunk_size=STREAM_CHUNK_SIZE, **kwargs):
+        """Yields the JSON envelope in pieces, encoding rows as they are read."""
+        rows = self.iter_serialize(chunk_size)
+        envelope = dict(status=True, graph=self.graph)
+        envelope.update(dict(kwargs))
+        logger.info("streaming", envelope)
+        # envelope first, "data" is left open and filled as rows arrive
+        yield ujson.dumps(envelope)[:-1] + ',"data":['
+        buffer = []
+        sep = ""
+        for row in rows:
+            buffer.append(ujson.dumps(row))
+            if len(buffer) >= chunk_size:
+                yield sep + ",".join(buffer)
+                buffer = []
+                sep = ","
+        if buffer:
+            yield sep + ",".join(buffer)
+        yield "]}"
+
+    def to_streaming_response(self, request, **kwargs):
+        """
+        Returns a StreamingHttpResponse so large lists are written in constant memory.
+        """
+        return StreamingHttpResponse(self.to_json_stream(**kwargs), content_type='application/json')
+
+    def to_cached_response(self, request, cache):
+        """
+        Returns the JSON response for a single instance with ETag/Last-Modified headers.
+        The encoded body is reused while the instance (and nested graph) auto_now timestamps
+        are unchanged and conditional requests are answered with 304. Graphs that cannot be
+        versioned that way (see `GraphPlan.is_cacheable`) get a plain response.
+        """
+        if self.many or self._wants_html(request):
+            return self.to_response(request)
+        plan = get_graph_plan(self.instance.__class__, self.graph)
+        if not plan.is_cacheable:
+            return self.to_response(request)
+        self.graph = plan.graph
+        version = plan.get_version(self.instance)
+        key = f"{plan.model._meta.label}:{self.instance.pk}:{plan.graph}:{version}"
+        etag = f'"{hashlib.md5(key.encode("utf-8")).hexdigest()}"'
+        # dated by the whole graph, a nested change must not answer If-Modified-Since with 304
+        last_modified = plan.get_last_modified(self.instance)
+        last_modified = int(last_modified.timestamp()) if last_modified is not None else None
+
+        if_none_match = request.headers.get("If-None-Match", None)
+        if if_none_match is not None:
+            tags = [tag.strip().removeprefix("W/") for tag in if_none_match.split(",")]
+            not_modified = etag in tags or "*" in tags
+        else:
+            since = parse_http_date_safe(request.headers.get("If-Modified-Since", ""))
+            not_modified = since is not None and last_modified is not None and last_modified <= since
+        if not_modified:
+            response = HttpResponseNotModified()
+        else:
+            body = cache.get(key)
+            if body is None:
+                body = self.to_json()
+                cache.set(key, body)
+            response = HttpResponse(body, content_type='application/json')
+        response["ETag"] = etag
+        response["Cache-Control"] = "private, no-cache"
+        if last_modified is not None:
+            response["Last-Modified"] = http_date(last_modified)
+        return response
+
+    def _wants_html(self, request):
+        accept_header = request.headers.get('Accept', '')
+        return 'text/html' in accept_header or 'text/plain' in accept_header
+
     def to_response(self, request, **kwargs):
         """
         Determines the response format based on the client's Accept header.
         """
-        accept_header = request.headers.get('Accept', '')
-        if 'text/html' in accept_header or 'text/plain' in accept_header:
-            json_data = self.to_json()
-            # Wrap JSON in HTML with basic formatting for color
-            response_data = f"""
+        if self._wants_html(request):
+            return self.to_html_response(self.to_json())
+        return HttpResponse(self.to_json(**kwargs), content_type='application/json')
+
+    async def ato_response(self, request, **kwargs):
+        """
+        Async `to_response`.
+        """
+        if self._wants_html(request):
+            return self.to_html_response(await self.ato_json())
+        return HttpResponse(await self.ato_json(**kwargs), content_type='application/json')
+
+    def to_html_response(self, json_data):
+        """Wraps JSON in HTML with basic formatting for color."""
+        response_data = f"""
             <html>
             <head>
             <style>
@@ -146,9 +223,7 @@ class GraphSerializer:
             </body>
             </html>
             """
-            return HttpResponse(response_data, content_type='text/html')
-        else:
-            return HttpResponse(self.to_json(**kwargs), content_type='application/json')
+        return HttpResponse(response_data, content_type='text/html')
 
     def _colorize_json(self, json_data):
         """Returns JSON data with HTML span wrappers for colors."""
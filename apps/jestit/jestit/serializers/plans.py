@@ -0,0 +1,333 @@
+from django.core.exceptions import FieldDoesNotExist
+from django.db.models import DateTimeField, ForeignKey, OneToOneField
+
+from jestit.helpers import logit
+
+logger = logit.get_logger("serializer", "serializer.log")
+
+# Compiled plans keyed by (model, graph name)
+GRAPH_PLANS = {}
+MISSING = object()
+
+
+def get_graph_plan(model, graph="default"):
+    """
+    Returns the cached GraphPlan for a model/graph pair, compiling it on first use.
+    Unknown graph names share the "default" plan, so client supplied names never grow the cache.
+    """
+    key = (model, resolve_graph_name(model, graph))
+    plan = GRAPH_PLANS.get(key)
+    if plan is None:
+        plan = GraphPlan(model, key[1])
+        GRAPH_PLANS[key] = plan
+    return plan
+
+
+def resolve_graph_name(model, graph):
+    """
+    Returns `graph` when the model's `RestMeta.GRAPHS` defines it, otherwise "default".
+    """
+    graphs = getattr(getattr(model, "RestMeta", None), "GRAPHS", None)
+    if graphs is not None and graph in graphs:
+        return graph
+    return "default"
+
+
+def to_epoch(value):
+    return int(value.timestamp())
+
+
+def to_related_id(value):
+    return value.id
+
+
+class GraphPlan:
+    """
+    A `RestMeta.GRAPHS` entry compiled for a single model.
+
+    Resolves the graph config, field list, converters, extras and related graphs once
+    so serializing a row is a straight walk over prebuilt getters.
+    """
+
+    def __init__(self, model, graph="default"):
+        """
+        :param model: The Django model class.
+        :param graph: The requested graph name, falls back to "default" when missing.
+        """
+        self.model = model
+        self.graph = graph
+        config = self._resolve_config()
+        self.config = config
+        self.fields = tuple(self._compile_fields(config.get("fields", None)))
+        self.extras = tuple(self._compile_extras(config.get("extra", [])))
+        self.related = tuple(self._compile_related(config.get("graphs", {})))
+        self.values = tuple(self._compile_values(config.get("fields", None)))
+        # only auto_now fields are bumped by every save, the others cannot version a row
+        self.version_fields = tuple(
+            field.attname for field in model._meta.concrete_fields
+            if isinstance(field, DateTimeField) and field.auto_now)
+        self._related_plans = None
+        self._async_safe = None
+        self._cacheable = None
+
+    def _resolve_config(self):
+        rest_meta = getattr(self.model, "RestMeta", None)
+        if rest_meta is None or not hasattr(rest_meta, "GRAPHS"):
+            logger.warning(f"RestMeta not found for {self.model.__name__}")
+            return {}
+        graph_config = rest_meta.GRAPHS.get(self.graph)
+        if graph_config is None and self.graph != "default":
+            self.graph = "default"
+            graph_config = rest_meta.GRAPHS.get(self.graph)
+        # If graph is not defined or None, assume all fields should be included
+        if graph_config is None:
+            logger.warning(f"graph '{self.graph}' not found for {self.model.__name__}")
+            return {}
+        logger.info(f"compiled graph '{self.graph}' for {self.model.__name__}", graph_config)
+        return graph_config
+
+    def _compile_fields(self, fields=None):
+        """
+        Yields (name, attname, converter) for each concrete field in the graph.
+        """
+        for field in self.model._meta.fields:
+            if fields and field.name not in fields:
+                continue
+            if isinstance(field, (ForeignKey, OneToOneField)):
+                if field.target_field.primary_key:
+                    # read the raw id so we never fetch the related row
+                    yield field.name, field.attname, None
+                else:
+                    yield field.name, field.name, to_related_id
+            elif isinstance(field, DateTimeField):
+                yield field.name, field.attname, to_epoch
+            else:
+                yield field.name, field.attname, None
+
+    def _compile_values(self, fields=None):
+        """
+        Yields (name, values_list lookup, converter) for each concrete field in the graph.
+        """
+        for field in self.model._meta.fields:
+            if fields and field.name not in fields:
+                continue
+            if isinstance(field, (ForeignKey, OneToOneField)):
+                if field.target_field.primary_key:
+                    yield field.name, field.attname, None
+                else:
+                    yield field.name, f"{field.name}__{field.related_model._meta.pk.name}", None
+            elif isinstance(field, DateTimeField):
+                yield field.name, field.attname, to_epoch
+            else:
+                yield field.name, field.attname, None
+
+    def _compile_extras(self, extra_fields):
+        for field in extra_fields:
+            if isinstance(field, tuple):  # Handle renamed method serialization
+                yield field
+            else:
+                yield field, field
+
+    def _compile_related(self, related_graphs):
+        for related_field, sub_graph in related_graphs.items():
+            try:
+                field_obj = self.model._meta.get_field(related_field)
+            except FieldDoesNotExist:
+                logger.warning(f"graph field '{related_field}' not found for {self.model.__name__}")
+                continue
+            if isinstance(field_obj, (ForeignKey, OneToOneField)):
+                yield related_field, field_obj.related_model, sub_graph
+
+    @property
+    def related_plans(self):
+        # resolved lazily so self referencing graphs (ie parent groups) do not recurse
+        if self._related_plans is None:
+            self._related_plans = tuple(
+                (name, get_graph_plan(model, sub_graph))
+                for name, model, sub_graph in self.related)
+        return self._related_plans
+
+    @property
+    def is_flat(self):
+        """
+        True when the graph is only concrete fields and can be read with `.values_list()`.
+        """
+        return not self.extras and not self.related
+
+    @property
+    def is_async_safe(self):
+        """
+        True when serializing an instance loaded with `get_select_related()` never queries,
+        the graph and its nested graphs have no extras and do not recurse.
+        """
+        if self._async_safe is None:
+            self._async_safe = self._check_async_safe(set())
+        return self._async_safe
+
+    def _check_async_safe(self, seen):
+        if self.extras or (self.model, self.graph) in seen:
+            return False
+        seen.add((self.model, self.graph))
+        return all(plan._check_async_safe(set(seen)) for _, plan in self.related_plans)
+
+    @property
+    def is_cacheable(self):
+        """
+        True when `get_version` changes on every save of the graph, each graph in the tree
+        has an auto_now field, no extras (they may read other tables or the request user)
+        and does not recurse.
+        """
+        if self._cacheable is None:
+            self._cacheable = self._check_cacheable(set())
+        return self._cacheable
+
+    def _check_cacheable(self, seen):
+        if self.extras or not self.version_fields or (self.model, self.graph) in seen:
+            return False
+        seen.add((self.model, self.graph))
+        return all(plan._check_cacheable(set(seen)) for _, plan in self.related_plans)
+
+    def get_version(self, obj, seen=None):
+        """
+        Returns a tuple of the instance timestamps and those of its nested graph instances,
+        it changes whenever a save bumps an auto_now field anywhere in the graph.
+        """
+        seen = set() if seen is None else seen
+        seen.add((self.model, self.graph))
+        version = [obj.pk]
+        version.extend(getattr(obj, attname) for attname in self.version_fields)
+        for name, plan in self.related_plans:
+            related_obj = getattr(obj, name, None)
+            if related_obj is None or (plan.model, plan.graph) in seen:
+                version.append(getattr(related_obj, "pk", None))
+            else:
+                version.append(plan.get_version(related_obj, set(seen)))
+        return tuple(version)
+
+    def get_last_modified(self, obj, seen=None):
+        """
+        Returns the latest timestamp of the instance and its nested graph instances, or None
+        when an instance in the graph has no timestamp (its changes cannot be dated).
+        """
+        seen = set() if seen is None else seen
+        seen.add((self.model, self.graph))
+        timestamps = [getattr(obj, attname) for attname in self.version_fields]
+        timestamps = [ts for ts in timestamps if ts is not None]
+        if not timestamps:
+            return None
+        for name, plan in self.related_plans:
+            related_obj = getattr(obj, name, None)
+            if related_obj is None or (plan.model, plan.graph) in seen:
+                continue
+            timestamp = plan.get_last_modified(related_obj, set(seen))
+            if timestamp is None:
+                return None
+            timestamps.append(timestamp)
+        return max(timestamps)
+
+    def get_select_related(self, prefix="", seen=None):
+        """
+        Returns the select_related paths needed by this plan and its nested plans.
+        """
+        seen = set() if seen is None else seen
+        seen.add((self.model, self.graph))
+        output = []
+        for name, plan in self.related_plans:
+            path = f"{prefix}{name}"
+            output.append(path)
+            if (plan.model, plan.graph) not in seen:
+                output.extend(plan.get_select_related(f"{path}__", set(seen)))
+        return output
+
+    def get_only_fields(self, prefix="", seen=None):
+        """
+        Returns the column names to pass to `.only()` for this plan and its nested plans.
+        Plans with extras keep every concrete column since methods may read any of them.
+        """
+        seen = set() if seen is None else seen
+        seen.add((self.model, self.graph))
+        opts = self.model._meta
+        if self.extras or not self.config:
+            names = [field.name for field in opts.concrete_fields]
+        else:
+            names = [opts.pk.name]
+            names.extend(name for name, _, _ in self.fields if name != opts.pk.name)
+        output = [f"{prefix}{name}" for name in names]
+        for name, plan in self.related_plans:
+            path = f"{prefix}{name}"
+            if path not in output:
+                output.append(path)
+            if (plan.model, plan.graph) in seen:
+                # a cycle, load the whole related row instead of recursing
+                output.extend(f"{path}__{field.name}" for field in plan.model._meta.concrete_fields)
+            else:
+                output.extend(plan.get_only_fields(f"{path}__", set(seen)))
+        return output
+
+    def serialize(self, obj):
+        """
+        Serializes a single model instance using the compiled plan.
+        """
+        data = {}
+        for name, attname, convert in self.fields:
+            value = getattr(obj, attname)
+            if convert is not None and value is not None:
+                value = convert(value)
+            data[name] = value
+
+        for method_name, alias in self.extras:
+            attr = getattr(obj, method_name, MISSING)
+            if attr is not MISSING:
+                data[alias] = attr() if callable(attr) else attr
+
+        if self.related:
+            for name, plan in self.related_plans:
+                related_obj = getattr(obj, name, None)
+                if related_obj is not None:
+                    data[name] = plan.serialize(related_obj)
+        return data
+
+    def serialize_values(self, queryset):
+        """
+        Serializes a flat plan straight from `.values_list()` rows, skipping model instantiation.
+        """
+        return list(self.iter_values(queryset))
+
+    def iter_values(self, queryset, chunk_size=None):
+        """
+        Yields serialized rows of a flat plan from `.values_list()`,
+        streaming from the database cursor when `chunk_size` is given.
+        """
+        rows = self.get_values_queryset(queryset)
+        if chunk_size:
+            rows = rows.iterator(chunk_size=chunk_size)
+        convert = self.get_row_converter()
+        for row in rows:
+            yield convert(row)
+
+    async def aserialize_values(self, queryset):
+        """
+        Async `serialize_values`, rows are read with async iteration.
+        """
+        convert = self.get_row_converter()
+        return [convert(row) async for row in self.get_values_queryset(queryset)]
+
+    def get_values_queryset(self, queryset):
+        return queryset.values_list(*[lookup for _, lookup, _ in self.values])
+
+    def get_row_converter(self):
+        """
+        Returns a function turning a `.values_list()` row into the serialized dict.
+        """
+        names = [name for name, _, _ in self.values]
+        converters = [(index, convert) for index, (_, _, convert) in enumerate(self.values)
+                      if convert is not None]
+
+        def convert_row(row):
+            if converters:
+                row = list(row)
+                for index, convert in converters:
+                    if row[index] is not None:
+                        row[index] = convert(row[index])
+            return dict(zip(names, row))
+        return convert_row
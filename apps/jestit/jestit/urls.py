@@ -3,10 +3,13 @@ import os
 from django.urls import path, include
 from jestit.helpers.settings import settings
 from jestit.helpers import modules
+from jestit.decorators.http import batch_dispatcher
 
 JESTIT_API_MODULE = settings.get("JESTIT_API_MODULE", "rest")
 
-urlpatterns = []
+urlpatterns = [
+    path("batch", batch_dispatcher)
+]
 
 def load_jest_modules():
     for app in settings.INSTALLED_APPS:
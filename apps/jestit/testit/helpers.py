@@ -18,6 +18,19 @@ class TestitAbort(Exception):
     pass
 
 
+def setup_django():
+    """
+    Configures Django inside the test process for tests that need the ORM directly
+    (ie counting the queries a request runs).
+    """
+    import os
+    import django
+    from django.apps import apps
+    if not apps.ready:
+        os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'project')
+        django.setup()
+
+
 # Test Decorator
 def unit_test(name=None):
     """
@@ -144,3 +144,215 @@ def test_user_can_list_group(opts):
     resp = opts.client.get("/api/authit/group", params=dict(id=opts.group_id))
     assert resp.status_code == 200, f"Expected status_code is 200 but got {resp.status_code}"
     assert resp.response.count == 1, "size is not 1"
+
+
+@th.unit_test("jwt_user_cache")
+def test_jwt_user_cache(opts):
+    th.setup_django()
+    from django.db import connection
+    from django.test import Client
+    from django.test.utils import CaptureQueriesContext
+    from authit.models import User
+    from authit.utils.jwtoken import JWToken
+    username = f"jwtcache{faker.fake.pyint()}"
+    user = User.objects.create(username=username, email=f"{username}@example.com")
+    token = JWToken(user.get_auth_key()).create(uid=user.id).access_token
+    client = Client(SERVER_NAME="localhost", HTTP_AUTHORIZATION=f"bearer {token}")
+    path = "/api/example/todo"
+    resp = client.get(path, dict(size=1, count=0))
+    assert resp.status_code == 200, f"Expected status_code is 200 but got {resp.status_code}"
+    with CaptureQueriesContext(connection) as ctx:
+        resp = client.get(path, dict(size=1, count=0))
+    assert resp.status_code == 200, f"Expected status_code is 200 but got {resp.status_code}"
+    auth_queries = [q["sql"] for q in ctx.captured_queries if "authit_user" in q["sql"]]
+    assert not auth_queries, f"cached token still queried the user: {auth_queries}"
+    from authit.utils import usercache
+    assert usercache.TOKEN_CACHE.get(token.rpartition(".")[2]) is not None, "token not cached by signature"
+    assert usercache.TOKEN_CACHE.get(token) is None, "token cached by the whole string"
+    # rotating the auth_key must revoke the cached token
+    user.auth_key = None
+    user.get_auth_key()
+    resp = client.get(path, dict(size=1, count=0))
+    assert resp.status_code == 401, f"Expected status_code is 401 but got {resp.status_code}"
+    user.delete()
+
+
+@th.unit_test("user_touch_coalesced")
+def test_user_touch_coalesced(opts):
+    th.setup_django()
+    from django.db import connection
+    from django.test.utils import CaptureQueriesContext
+    from authit.models import User
+    from authit.utils.activity import ActivityRecorder
+    names = [f"touch_{faker.fake.pyint()}_{i}" for i in range(2)]
+    users = [User.objects.create(username=name, email=f"{name}@example.com") for name in names]
+    recorder = ActivityRecorder(User, interval=3600, window=60)
+    try:
+        with CaptureQueriesContext(connection) as ctx:
+            for user in users:
+                assert recorder.record(user), "first touch was skipped"
+                assert not recorder.record(user), "touch inside the window was not skipped"
+        assert not ctx.captured_queries, "touch wrote before the flush"
+        with CaptureQueriesContext(connection) as ctx:
+            recorder.flush()
+        assert len(ctx.captured_queries) == 1, f"expected a single UPDATE, got {len(ctx.captured_queries)}"
+        for user in users:
+            saved = User.objects.get(id=user.id)
+            assert saved.last_activity == user.last_activity, "last_activity was not written"
+    finally:
+        recorder.stop()
+        User.objects.filter(username__in=names).delete()
+
+
+@th.unit_test("user_touch_failed_flush")
+def test_user_touch_failed_flush(opts):
+    import datetime
+    th.setup_django()
+    from authit.models import User
+    from authit.utils.activity import ActivityRecorder
+
+    class FailingRecorder(ActivityRecorder):
+        failing = True
+
+        def write(self, field, stamps):
+            if self.failing:
+                raise RuntimeError("database unavailable")
+            super().write(field, stamps)
+
+    name = f"touch_{faker.fake.pyint()}"
+    user = User.objects.create(username=name, email=f"{name}@example.com")
+    first = datetime.datetime(2020, 1, 1, tzinfo=datetime.timezone.utc)
+    recorder = FailingRecorder(User, interval=3600, window=0)
+    try:
+        recorder.record(user, when=first + datetime.timedelta(seconds=10))
+        try:
+            recorder.flush()
+            assert False, "flush should raise when the update fails"
+        except RuntimeError:
+            pass
+        assert recorder.pending["last_activity"][user.pk] == first + datetime.timedelta(seconds=10), "failed update dropped"
+        assert User.objects.get(pk=user.pk).last_activity is None, "failed update was written"
+        # a newer touch while the flush was failing wins over the requeued one
+        recorder.record(user, when=first + datetime.timedelta(seconds=20))
+        recorder.requeue(dict(last_activity={user.pk: first + datetime.timedelta(seconds=15)}))
+        assert recorder.pending["last_activity"][user.pk] == first + datetime.timedelta(seconds=20), "newer stamp lost"
+        recorder.failing = False
+        recorder.flush()
+        assert not recorder.pending, "written stamps still pending"
+        assert User.objects.get(pk=user.pk).last_activity == first + datetime.timedelta(seconds=20)
+        recorder.record(user)
+        recorder.reset()
+        assert recorder.thread is None and not recorder.pending, "recorder was not reset"
+    finally:
+        recorder.stop()
+        user.delete()
+
+
+@th.unit_test("compiled_permissions")
+def test_compiled_permissions(opts):
+    th.setup_django()
+    from authit.models import User
+    from example.models import Note, TODO
+    assert User.get_rest_perms("VIEW_PERMS") == frozenset(["view_users", "manage_users", "owner"])
+    assert Note.get_rest_perms(["DELETE_PERMS", "SAVE_PERMS"]) == frozenset(["save_notes"])
+    assert not TODO.get_rest_perms(["SAVE_PERMS", "VIEW_PERMS"]), "TODO has no perms"
+    user = User(permissions=dict(view_users=True, manage_users=False))
+    assert user.has_permission("view_users")
+    assert not user.has_permission("manage_users"), "disabled permission passed"
+    assert user.has_permission(["manage_users", "view_users"])
+    assert user.has_permission(["all"])
+    assert not user.has_permission(Note.get_rest_perms("SAVE_PERMS"))
+    user.add_permission("save_notes", commit=False)
+    assert user.has_permission(Note.get_rest_perms("SAVE_PERMS")), "added permission not seen"
+    user.permissions = dict(view_users=False)
+    assert not user.has_permission("view_users"), "reassigned permissions not seen"
+    user.permissions["manage_users"] = True
+    assert user.has_permission("manage_users"), "permission edited in place not seen"
+
+
+@th.unit_test("group_member_cache")
+def test_group_member_cache(opts):
+    th.setup_django()
+    from django.db import connection
+    from django.test import Client
+    from django.test.utils import CaptureQueriesContext
+    from authit.models import User, Group, GroupMember
+    from authit.utils.jwtoken import JWToken
+    username = f"membercache{faker.fake.pyint()}"
+    user = User.objects.create(username=username, email=f"{username}@example.com")
+    group = Group.objects.create(name=faker.generate_name())
+    member = GroupMember.objects.create(user=user, group=group, permissions=dict(view_groups=True))
+    token = JWToken(user.get_auth_key()).create(uid=user.id).access_token
+    client = Client(SERVER_NAME="localhost", HTTP_AUTHORIZATION=f"bearer {token}")
+    path = "/api/authit/group/member"
+    params = dict(group=group.id, count=0)
+    resp = client.get(path, params)
+    assert resp.status_code == 200, f"Expected status_code is 200 but got {resp.status_code}"
+    assert resp.json()["data"][0]["id"] == member.id, "membership not listed"
+    with CaptureQueriesContext(connection) as ctx:
+        resp = client.get(path, params)
+    assert resp.status_code == 200, f"Expected status_code is 200 but got {resp.status_code}"
+    assert len(ctx.captured_queries) == 1, f"expected only the list query, got {len(ctx.captured_queries)}"
+    # saving the membership drops the cached permissions
+    member.permissions = {}
+    member.save()
+    resp = client.get(path, params)
+    assert resp.status_code == 403, f"Expected status_code is 403 but got {resp.status_code}"
+    group.delete()
+    user.delete()
+
+
+@th.unit_test("group_tree_paths")
+def test_group_tree_paths(opts):
+    th.setup_django()
+    from jestit import errors as jerrors
+    from authit.models import User, Group, GroupMember
+    from authit.utils import membercache
+    root = Group.objects.create(name=faker.generate_name())
+    child = Group.objects.create(name=faker.generate_name(), parent=root)
+    leaf = Group.objects.create(name=faker.generate_name(), parent=child)
+    other = Group.objects.create(name=faker.generate_name(), parent=root)
+    assert leaf.path == f"/{root.id}/{child.id}/", f"bad path {leaf.path}"
+    ids = set(Group.descendants_of(root).values_list("id", flat=True))
+    assert ids == {child.id, leaf.id, other.id}, f"bad descendants {ids}"
+    ids = set(Group.ancestors_of(leaf).values_list("id", flat=True))
+    assert ids == {root.id, child.id}, f"bad ancestors {ids}"
+    # moving a group rewrites its subtree
+    child.parent = other
+    child.save()
+    leaf.refresh_from_db()
+    assert leaf.path == f"/{root.id}/{other.id}/{child.id}/", f"subtree not moved {leaf.path}"
+    root.parent = leaf
+    try:
+        root.save()
+        assert False, "group moved below itself"
+    except jerrors.RestErrorException:
+        pass
+    username = f"grouptree{faker.fake.pyint()}"
+    user = User.objects.create(username=username, email=f"{username}@example.com")
+    member = GroupMember.objects.create(user=user, group=other, permissions=dict(view_groups=True))
+    inherited = membercache.load_inherited_member(user.id, Group.objects.get(id=leaf.id))
+    assert inherited is not None and inherited.id == member.id, "parent membership not inherited"
+    Group.objects.get(id=root.id).delete()
+    user.delete()
+
+
+@th.unit_test("group_deep_tree_paths")
+def test_group_deep_tree_paths(opts):
+    th.setup_django()
+    from authit.models import Group
+    root = Group.objects.create(name=faker.generate_name())
+    group = root
+    for _ in range(100):
+        group = Group.objects.create(name=faker.generate_name(), parent=group)
+    assert len(group.path) > 255, f"chain too short to test {len(group.path)}"
+    assert group.get_ancestor_ids()[-1] == root.id, "root missing from a deep path"
+    # moving the top of the chain rewrites every path below it
+    first = Group.objects.get(parent=root)
+    other = Group.objects.create(name=faker.generate_name(), parent=root)
+    first.parent = other
+    first.save()
+    group.refresh_from_db()
+    assert group.path.startswith(f"/{root.id}/{other.id}/{first.id}/"), "deep subtree not moved"
+    assert Group.descendants_of(root).count() == 101, "descendants missing from the deep tree"
+    root.delete()
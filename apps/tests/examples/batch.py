@@ -0,0 +1,68 @@
+from testit import helpers as th
+from testit import faker
+
+TEST_USER = "testit"
+TEST_PWORD = "testit##mojo"
+
+
+@th.unit_test("batch_create_and_get")
+def test_batch_create_and_get(opts):
+    name = faker.generate_name()
+    resp = opts.client.post("/api/batch", dict(requests=[
+        dict(method="POST", path="/api/example/todo", data=dict(name=name, kind="batch", description="batch")),
+        dict(method="GET", path="/api/example/todo", data=dict(kind="batch", size=5)),
+        dict(method="GET", path="/api/example/nothing")
+    ]))
+    assert resp.status_code == 200, f"Expected status_code is 200 but got {resp.status_code}"
+    assert len(resp.response.data) == 3, f"expected 3 results, got {len(resp.response.data)}"
+    created, listed, missing = resp.response.data
+    assert created.status == 200, f"create status {created.status}"
+    assert created.data.data.name == name, f"name: {created.data.data.name}"
+    assert listed.status == 200, f"list status {listed.status}"
+    assert listed.data.size == 5
+    assert created.data.data.id in [row.id for row in listed.data.data], "created todo not listed"
+    assert missing.status == 404, f"missing status {missing.status}"
+    opts.batch_todo_pk = created.data.data.id
+
+
+@th.unit_test("batch_parallel_reads")
+def test_batch_parallel_reads(opts):
+    resp = opts.client.post("/api/batch", dict(parallel=True, requests=[
+        dict(method="GET", path=f"/api/example/todo/{opts.batch_todo_pk}"),
+        dict(method="GET", path=f"/api/example/todo/{opts.batch_todo_pk}?graph=basic"),
+        dict(method="GET", path="/api/example/note")
+    ]))
+    assert resp.status_code == 200, f"Expected status_code is 200 but got {resp.status_code}"
+    full, basic, notes = resp.response.data
+    assert full.status == 200 and full.data.data.kind == "batch", f"kind: {full.data}"
+    assert basic.status == 200 and "kind" not in basic.data.data, f"basic graph: {basic.data}"
+    assert notes.status == 403, f"notes without a user should be 403, got {notes.status}"
+
+
+@th.unit_test("batch_shares_auth")
+def test_batch_shares_auth(opts):
+    opts.client.login(TEST_USER, TEST_PWORD)
+    assert opts.client.is_authenticated, "authentication failed"
+    resp = opts.client.post("/api/batch", dict(requests=[
+        dict(method="GET", path=f"/api/authit/user/{opts.client.jwt_data.uid}"),
+        dict(method="GET", path="/api/example/note", data=dict(size=1))
+    ]))
+    assert resp.status_code == 200, f"Expected status_code is 200 but got {resp.status_code}"
+    user, notes = resp.response.data
+    assert user.status == 200, f"user status {user.status}"
+    assert user.data.data.username == TEST_USER, f"username: {user.data.data.username}"
+    assert notes.status == 200, f"notes status {notes.status}"
+    opts.client.logout()
+
+
+@th.unit_test("batch_invalid_group")
+def test_batch_invalid_group(opts):
+    for parallel in [False, True]:
+        resp = opts.client.post("/api/batch", dict(parallel=parallel, requests=[
+            dict(method="GET", path="/api/example/todo", data=dict(group="abc", size=1)),
+            dict(method="GET", path=f"/api/example/todo/{opts.batch_todo_pk}")
+        ]))
+        assert resp.status_code == 200, f"Expected status_code is 200 but got {resp.status_code}"
+        invalid, todo = resp.response.data
+        assert invalid.status == 400, f"invalid group status {invalid.status}"
+        assert todo.status == 200, f"todo status {todo.status}"
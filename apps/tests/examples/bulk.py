@@ -0,0 +1,99 @@
+from testit import helpers as th
+from testit import faker
+
+TEST_USER = "testit"
+TEST_PWORD = "testit##mojo"
+
+
+@th.unit_test("bulk_create_todo")
+def test_bulk_create_todo(opts):
+    opts.client.login(TEST_USER, TEST_PWORD)
+    resp = opts.client.post("/api/example/note", dict(name=faker.generate_name(), kind="bulk", description="bulk"))
+    assert resp.status_code == 200, f"Expected status_code is 200 but got {resp.status_code}"
+    opts.bulk_note_pk = resp.response.data.id
+    opts.bulk_kind = f"bulk_{faker.fake.pyint()}"
+    rows = [dict(name=faker.generate_name(), kind=opts.bulk_kind, description="bulk", note=opts.bulk_note_pk)
+            for _ in range(200)]
+    rows.append("not a row")
+    resp = opts.client.post("/api/example/todo", rows)
+    assert resp.status_code == 200, f"Expected status_code is 200 but got {resp.status_code}"
+    assert resp.response.created == 200, f"created: {resp.response.created}"
+    assert resp.response.errors == 1, f"errors: {resp.response.errors}"
+    assert resp.response.data[-1].code == 400, "invalid row not reported"
+    opts.bulk_pks = [row.id for row in resp.response.data[:-1]]
+    assert None not in opts.bulk_pks, "missing ids for created rows"
+    resp = opts.client.get("/api/example/todo", params=dict(kind=opts.bulk_kind, size=1))
+    assert resp.response.count == 200, f"count is not 200 {resp.response.count}"
+    assert resp.response.data[0].note.id == opts.bulk_note_pk, "note relation not set"
+
+
+@th.unit_test("bulk_update_todo")
+def test_bulk_update_todo(opts):
+    rows = [dict(id=pk, description="bulk updated") for pk in opts.bulk_pks[:50]]
+    rows.append(dict(id=0, description="missing"))
+    resp = opts.client.put("/api/example/todo", rows)
+    assert resp.status_code == 200, f"Expected status_code is 200 but got {resp.status_code}"
+    assert resp.response.updated == 50, f"updated: {resp.response.updated}"
+    assert resp.response.data[-1].code == 404, "missing row not reported"
+    resp = opts.client.get(f"/api/example/todo/{opts.bulk_pks[0]}")
+    assert resp.response.data.description == "bulk updated", f"description: {resp.response.data.description}"
+    assert resp.response.data.name is not None, "untouched field was cleared"
+
+
+@th.unit_test("bulk_delete_not_allowed")
+def test_bulk_delete_not_allowed(opts):
+    resp = opts.client._make_request("DELETE", "/api/example/todo", json=opts.bulk_pks[:5])
+    assert resp.status_code == 403, f"Expected status_code is 403 but got {resp.status_code}"
+    opts.client.logout()
+
+
+@th.unit_test("bulk_delete_todo")
+def test_bulk_delete_todo(opts):
+    import ujson
+    th.setup_django()
+    from django.test import Client
+    from example.models import TODO
+    client = Client(SERVER_NAME="localhost")
+    pks = opts.bulk_pks[:5]
+    # RestMeta is shared by every later test, put back exactly what was there
+    missing = object()
+    can_delete = TODO.RestMeta.__dict__.get("CAN_DELETE", missing)
+    TODO.RestMeta.CAN_DELETE = True
+    try:
+        resp = client.delete("/api/example/todo", ujson.dumps(pks + [0]), content_type="application/json")
+    finally:
+        if can_delete is missing:
+            del TODO.RestMeta.CAN_DELETE
+        else:
+            TODO.RestMeta.CAN_DELETE = can_delete
+    assert TODO.RestMeta.__dict__.get("CAN_DELETE", missing) is can_delete, "CAN_DELETE was not restored"
+    assert resp.status_code == 200, f"Expected status_code is 200 but got {resp.status_code} {resp.content}"
+    data = resp.json()
+    assert data["deleted"] == 5, f"deleted: {data['deleted']}"
+    assert data["data"][-1]["code"] == 404, "missing row not reported"
+    assert not TODO.objects.filter(pk__in=pks).exists(), "rows were not deleted"
+
+
+@th.unit_test("bulk_create_checks_instances")
+def test_bulk_create_checks_instances(opts):
+    import ujson
+    th.setup_django()
+    from django.test import RequestFactory
+    from authit.models import User
+    from example.models import Note
+    request = RequestFactory().post("/api/example/note")
+    request.user = User(username="bulkcheck", permissions=dict(save_notes=True))
+    request.group = None
+    kind = f"bulk_check_{faker.fake.pyint()}"
+    Note.on_rest_check_permission = lambda self, perms, request: self.name != "denied"
+    try:
+        resp = Note.on_rest_handle_bulk_save(request, [
+            dict(name="allowed", kind=kind, description="bulk"),
+            dict(name="denied", kind=kind, description="bulk")])
+    finally:
+        del Note.on_rest_check_permission
+    data = ujson.loads(resp.content)
+    assert data["created"] == 1, f"created: {data['created']}"
+    assert data["data"][1]["code"] == 403, "denied row was not rejected"
+    assert list(Note.objects.filter(kind=kind).values_list("name", flat=True)) == ["allowed"]
+    Note.objects.filter(kind=kind).delete()
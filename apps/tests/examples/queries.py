@@ -0,0 +1,283 @@
+from testit import helpers as th
+from testit import faker
+
+
+def get_local_client():
+    th.setup_django()
+    from django.test import Client
+    return Client(SERVER_NAME="localhost")
+
+
+def count_queries(client, path, params):
+    from django.db import connection
+    from django.test.utils import CaptureQueriesContext
+    with CaptureQueriesContext(connection) as ctx:
+        resp = client.get(path, params)
+    assert resp.status_code == 200, f"Expected status_code is 200 but got {resp.status_code}"
+    return len(ctx.captured_queries), resp.json()
+
+
+@th.unit_test("setup_todo_rows")
+def test_setup_todo_rows(opts):
+    opts.local_client = get_local_client()
+    from example.models import TODO, Note
+    opts.query_kind = f"qc_{faker.fake.pyint()}"
+    notes = Note.objects.bulk_create([
+        Note(name=faker.generate_name(), kind="ticket", description="query count")
+        for _ in range(100)])
+    TODO.objects.bulk_create([
+        TODO(name=faker.generate_name(), kind=opts.query_kind, description="query count", note=note)
+        for note in notes])
+    assert TODO.objects.filter(kind=opts.query_kind).count() == 100
+
+
+@th.unit_test("list_todo_query_count")
+def test_list_todo_query_count(opts):
+    small, resp = count_queries(opts.local_client, "/api/example/todo", dict(kind=opts.query_kind, size=10, count=0))
+    assert len(resp["data"]) == 10, f"expected 10 rows, got {len(resp['data'])}"
+    large, resp = count_queries(opts.local_client, "/api/example/todo", dict(kind=opts.query_kind, size=100, count=0))
+    assert len(resp["data"]) == 100, f"expected 100 rows, got {len(resp['data'])}"
+    assert resp["data"][0]["note"]["kind"] == "ticket", "missing nested note graph"
+    assert large == small, f"query count grows with page size: {small} vs {large}"
+    assert large == 1, f"expected a single page query, got {large}"
+
+
+@th.unit_test("get_todo_query_count")
+def test_get_todo_query_count(opts):
+    from example.models import TODO
+    todo = TODO.objects.filter(kind=opts.query_kind).last()
+    total, resp = count_queries(opts.local_client, f"/api/example/todo/{todo.id}", {})
+    assert resp["data"]["note"]["id"] == todo.note_id, "missing nested note graph"
+    assert total == 1, f"expected a single query, got {total}"
+
+
+@th.unit_test("values_graph_matches_instances")
+def test_values_graph_matches_instances(opts):
+    from jestit.serializers.models import GraphSerializer
+    from authit.models import Group, User
+    for model in [Group, User]:
+        qset = model.objects.all().order_by("id")
+        expected = GraphSerializer(qset, graph="basic", values=False).serialize()
+        actual = GraphSerializer(qset, graph="basic").serialize()
+        assert actual == expected, f"values_list output differs for {model.__name__}"
+
+
+@th.unit_test("list_todo_flat_graph")
+def test_list_todo_flat_graph(opts):
+    total, resp = count_queries(opts.local_client, "/api/example/todo", dict(kind=opts.query_kind, size=50, graph="basic"))
+    assert len(resp["data"]) == 50, f"expected 50 rows, got {len(resp['data'])}"
+    assert "note" not in resp["data"][0], "basic graph should not include note"
+    assert total <= 2, f"expected count + page query, got {total}"
+
+
+@th.unit_test("unknown_graph_shares_default_plan")
+def test_unknown_graph_shares_default_plan(opts):
+    from jestit.serializers import plans
+    from example.models import TODO
+    default = plans.get_graph_plan(TODO, "default")
+    before = len(plans.GRAPH_PLANS)
+    for i in range(20):
+        resp = opts.local_client.get("/api/example/todo", dict(kind=opts.query_kind, size=1, graph=f"junk{i}"))
+        assert resp.status_code == 200, f"Expected status_code is 200 but got {resp.status_code}"
+    assert len(plans.GRAPH_PLANS) == before, "unknown graph names were cached"
+    assert plans.get_graph_plan(TODO, "junk") is default, "unknown graph should use the default plan"
+
+
+@th.unit_test("list_todo_stream")
+def test_list_todo_stream(opts):
+    import ujson
+    params = dict(kind=opts.query_kind, size=100, sort="id")
+    expected = opts.local_client.get("/api/example/todo", params).json()
+    resp = opts.local_client.get("/api/example/todo", dict(stream=1, **params))
+    assert resp.status_code == 200, f"Expected status_code is 200 but got {resp.status_code}"
+    assert resp.streaming, "response is not streaming"
+    data = ujson.loads(b"".join(resp.streaming_content))
+    for key in ["count", "page", "size", "graph", "data"]:
+        assert data[key] == expected[key], f"streamed {key} differs"
+
+
+@th.unit_test("list_todo_cursor")
+def test_list_todo_cursor(opts):
+    expected = opts.local_client.get("/api/example/todo", dict(kind=opts.query_kind, size=100, sort="-id")).json()
+    expected = [row["id"] for row in expected["data"]]
+    for sort in ["-id", "description", "-created"]:
+        ids = []
+        cursor = ""
+        while cursor is not None:
+            resp = opts.local_client.get("/api/example/todo", dict(
+                kind=opts.query_kind, size=30, sort=sort, cursor=cursor, count=0, graph="basic")).json()
+            assert "count" not in resp, "count=0 should skip the count"
+            assert len(resp["data"]) <= 30, f"page too large {len(resp['data'])}"
+            ids.extend(row["id"] for row in resp["data"])
+            cursor = resp["next"]
+        assert len(ids) == 100, f"sort {sort}: expected 100 rows, got {len(ids)}"
+        assert sorted(ids) == sorted(expected), f"sort {sort}: cursor pages missed rows"
+        if sort == "-id":
+            assert ids == expected, "cursor pages not in sort order"
+
+
+@th.unit_test("list_todo_count_cache")
+def test_list_todo_count_cache(opts):
+    from example.models import TODO
+    from jestit.helpers import counts
+    counts.invalidate(TODO)
+    params = dict(kind=opts.query_kind, size=5, graph="basic")
+    first, resp = count_queries(opts.local_client, "/api/example/todo", params)
+    assert resp["count"] == 100, f"count is not 100 {resp['count']}"
+    cached, resp = count_queries(opts.local_client, "/api/example/todo", params)
+    assert cached == first - 1, f"count was not cached: {first} vs {cached}"
+    todo = TODO.objects.create(name=faker.generate_name(), kind=opts.query_kind, description="query count")
+    _, resp = count_queries(opts.local_client, "/api/example/todo", params)
+    assert resp["count"] == 101, f"count cache not invalidated {resp['count']}"
+    todo.delete()
+    _, resp = count_queries(opts.local_client, "/api/example/todo", params)
+    assert resp["count"] == 100, f"count cache not invalidated {resp['count']}"
+
+
+@th.unit_test("list_todo_count_estimate")
+def test_list_todo_count_estimate(opts):
+    from example.models import TODO
+    _, resp = count_queries(opts.local_client, "/api/example/todo", dict(count="estimate", size=1))
+    assert resp["count"] >= TODO.objects.count(), f"estimate too low {resp['count']}"
+    assert resp.get("count_estimated") is True, "estimate not flagged as approximate"
+    _, resp = count_queries(opts.local_client, "/api/example/todo", dict(kind=opts.query_kind, count="estimate", size=1))
+    assert resp["count"] == 100, f"filtered estimate should be exact {resp['count']}"
+    assert "count_estimated" not in resp, "exact count flagged as approximate"
+
+
+@th.unit_test("get_todo_etag")
+def test_get_todo_etag(opts):
+    from example.models import TODO
+    todo = TODO.objects.filter(kind=opts.query_kind).last()
+    path = f"/api/example/todo/{todo.id}"
+    resp = opts.local_client.get(path)
+    etag = resp.headers.get("ETag")
+    assert etag is not None, "missing ETag header"
+    assert resp.headers.get("Last-Modified") is not None, "missing Last-Modified header"
+    resp = opts.local_client.get(path, HTTP_IF_NONE_MATCH=etag)
+    assert resp.status_code == 304, f"Expected status_code is 304 but got {resp.status_code}"
+    resp = opts.local_client.get(path, dict(graph="basic"), HTTP_IF_NONE_MATCH=etag)
+    assert resp.status_code == 200, "graph change should not match the ETag"
+    # changing the nested note changes the etag of the todo
+    todo.note.name = faker.generate_name()
+    todo.note.save()
+    resp = opts.local_client.get(path, HTTP_IF_NONE_MATCH=etag)
+    assert resp.status_code == 200, f"Expected status_code is 200 but got {resp.status_code}"
+    assert resp.json()["data"]["note"]["name"] == todo.note.name, "stale nested note"
+    assert resp.headers.get("ETag") != etag, "ETag did not change"
+
+
+@th.unit_test("get_cache_needs_auto_now")
+def test_get_cache_needs_auto_now(opts):
+    from jestit.models import JestitLog
+    from jestit.serializers import plans
+    from example.models import TODO
+    plan = plans.get_graph_plan(TODO, "default")
+    assert plan.version_fields == ("modified",), f"only auto_now fields version a row {plan.version_fields}"
+    assert plan.is_cacheable, "todo graph should be cacheable"
+    assert not plans.get_graph_plan(JestitLog, "default").is_cacheable, "created alone cannot version a row"
+    plan = plans.GraphPlan(TODO, "default")
+    plan.extras = (("user_name", "user_name"),)
+    assert not plan.is_cacheable, "graphs with extras must not be cached"
+
+
+@th.unit_test("get_todo_if_modified_since")
+def test_get_todo_if_modified_since(opts):
+    import datetime
+    from django.utils import timezone
+    from example.models import TODO, Note
+    todo = TODO.objects.filter(kind=opts.query_kind).last()
+    path = f"/api/example/todo/{todo.id}"
+    resp = opts.local_client.get(path)
+    last_modified = resp.headers.get("Last-Modified")
+    assert last_modified is not None, "missing Last-Modified header"
+    resp = opts.local_client.get(path, HTTP_IF_MODIFIED_SINCE=last_modified)
+    assert resp.status_code == 304, f"Expected status_code is 304 but got {resp.status_code}"
+    # only the nested note changes, later than any timestamp of the todo
+    name = faker.generate_name()
+    Note.objects.filter(pk=todo.note_id).update(
+        name=name, modified=timezone.now() + datetime.timedelta(seconds=5))
+    resp = opts.local_client.get(path, HTTP_IF_MODIFIED_SINCE=last_modified)
+    assert resp.status_code == 200, f"Expected status_code is 200 but got {resp.status_code}"
+    assert resp.json()["data"]["note"]["name"] == name, "stale nested note"
+    assert resp.headers.get("Last-Modified") != last_modified, "Last-Modified ignored the nested note"
+
+
+@th.unit_test("django_cache_clear_is_namespaced")
+def test_django_cache_clear_is_namespaced(opts):
+    from django.core.cache import cache as django_cache
+    from jestit.helpers.cache import DjangoCache
+    jcache = DjangoCache(prefix="jestit_clear_test")
+    django_cache.set("unrelated_clear_test", "kept")
+    jcache.set("row", "body")
+    assert jcache.get("row") == "body"
+    jcache.clear()
+    assert jcache.get("row") is None, "clear did not invalidate the namespace"
+    assert django_cache.get("unrelated_clear_test") == "kept", "clear wiped unrelated cache entries"
+    jcache.set("row", "fresh")
+    assert jcache.get("row") == "fresh", "entries written after clear should be readable"
+    django_cache.delete("unrelated_clear_test")
+
+
+@th.unit_test("save_todo_dirty_fields")
+def test_save_todo_dirty_fields(opts):
+    from django.db import connection
+    from django.test.utils import CaptureQueriesContext
+    from example.models import TODO
+    todo = TODO.objects.filter(kind=opts.query_kind).first()
+    path = f"/api/example/todo/{todo.id}"
+    with CaptureQueriesContext(connection) as ctx:
+        resp = opts.local_client.post(path, dict(name=todo.name, kind=todo.kind), content_type="application/json")
+    assert resp.status_code == 200, f"Expected status_code is 200 but got {resp.status_code}"
+    updates = [q["sql"] for q in ctx.captured_queries if q["sql"].startswith("UPDATE")]
+    assert not updates, f"unchanged save should not write: {updates}"
+    assert TODO.objects.get(id=todo.id).modified == todo.modified, "modified bumped without changes"
+
+    name = faker.generate_name()
+    with CaptureQueriesContext(connection) as ctx:
+        resp = opts.local_client.post(path, dict(name=name), content_type="application/json")
+    assert resp.json()["data"]["name"] == name, "name was not saved"
+    updates = [q["sql"] for q in ctx.captured_queries if q["sql"].startswith("UPDATE")]
+    assert len(updates) == 1, f"expected a single UPDATE, got {updates}"
+    assert '"description"' not in updates[0], f"unchanged columns written: {updates[0]}"
+    assert TODO.objects.get(id=todo.id).modified > todo.modified, "modified was not bumped"
+
+
+@th.unit_test("async_todo_matches_sync")
+def test_async_todo_matches_sync(opts):
+    from django.urls import resolve
+    from jestit.decorators import http as jd
+    from example.models import TODO
+    assert resolve("/api/example/todo/async").func is jd.arouter_dispatcher, "coroutine view not resolved async"
+    assert resolve("/api/example/todo").func is jd.router_dispatcher, "sync view resolved async"
+
+    for params in [dict(size=20, sort="-id"), dict(size=20, graph="basic", count="estimate"), dict(size=20, start=10)]:
+        params["kind"] = opts.query_kind
+        expected = opts.local_client.get("/api/example/todo", params).json()
+        resp = opts.local_client.get("/api/example/todo/async", params).json()
+        assert resp == expected, f"async list differs for {params}"
+    params = dict(kind=opts.query_kind, size=30, cursor="", count=0)
+    expected = opts.local_client.get("/api/example/todo", params).json()
+    resp = opts.local_client.get("/api/example/todo/async", params).json()
+    assert resp == expected, "async cursor page differs"
+
+    todo = TODO.objects.filter(kind=opts.query_kind).last()
+    total, resp = count_queries(opts.local_client, f"/api/example/todo/async/{todo.id}", {})
+    assert resp == opts.local_client.get(f"/api/example/todo/{todo.id}").json(), "async get differs"
+    assert total == 1, f"expected a single query, got {total}"
+
+    name = faker.generate_name()
+    resp = opts.local_client.post(f"/api/example/todo/async/{todo.id}", dict(name=name), content_type="application/json")
+    assert resp.json()["data"]["name"] == name, "async save failed"
+    assert TODO.objects.get(id=todo.id).name == name, "async save was not written"
+    resp = opts.local_client.delete(f"/api/example/todo/async/{todo.id}")
+    assert resp.status_code == 403, f"Expected status_code is 403 but got {resp.status_code}"
+
+
+@th.unit_test("cleanup_todo_rows")
+def test_cleanup_todo_rows(opts):
+    from example.models import TODO, Note
+    note_ids = list(TODO.objects.filter(kind=opts.query_kind).values_list("note_id", flat=True))
+    TODO.objects.filter(kind=opts.query_kind).delete()
+    Note.objects.filter(id__in=note_ids).delete()
+    assert TODO.objects.filter(kind=opts.query_kind).count() == 0
@@ -0,0 +1,149 @@
+from testit import helpers as th
+
+
+def build_writer(opts, **kwargs):
+    import os
+    import tempfile
+    th.setup_django()
+    from jestit.models import JestitLog
+    from jestit.helpers.batchwriter import BatchWriter
+    kwargs.setdefault("spill_path", os.path.join(tempfile.mkdtemp(), "jestitlog.spill"))
+    return BatchWriter(JestitLog, **kwargs)
+
+
+def wait_for(check, timeout=5.0):
+    import time
+    stop = time.time() + timeout
+    while time.time() < stop:
+        if check():
+            return True
+        time.sleep(0.05)
+    return check()
+
+
+@th.unit_test("batch_writer_flushes")
+def test_batch_writer_flushes(opts):
+    from jestit.models import JestitLog
+    kind = "batch_flush_test"
+    writer = build_writer(opts, batch_size=5, interval=60000)
+    for i in range(4):
+        writer.add(dict(kind=kind, model_id=i))
+    assert JestitLog.objects.filter(kind=kind).count() == 0, "rows written before the batch filled"
+    writer.add(dict(kind=kind, model_id=4))
+    assert wait_for(lambda: JestitLog.objects.filter(kind=kind).count() == 5), "full batch was not written"
+    writer.add(dict(kind=kind, model_id=5))
+    writer.stop()
+    assert JestitLog.objects.filter(kind=kind).count() == 6, "stop did not flush"
+    JestitLog.objects.filter(kind=kind).delete()
+
+
+@th.unit_test("batch_writer_spills")
+def test_batch_writer_spills(opts):
+    import os
+    from jestit.models import JestitLog
+    kind = "batch_spill_test"
+    writer = build_writer(opts, batch_size=100, interval=60000, max_buffer=2)
+    write = writer.write
+
+    def failing_write(rows):
+        raise RuntimeError("database unavailable")
+
+    writer.write = failing_write
+    for i in range(3):
+        writer.add(dict(kind=kind, model_id=i))
+    assert not os.path.exists(writer.spill_path), "overflow row was spilled on the caller's thread"
+    assert len(writer.overflow) == 1, "overflow row was not kept for the writer"
+    assert writer.flush() == 0
+    with open(writer.spill_path) as spill_file:
+        assert len(spill_file.readlines()) == 3, "failed rows were not spilled"
+    assert JestitLog.objects.filter(kind=kind).count() == 0
+
+    writer.write = write
+    writer.add(dict(kind=kind, model_id=3))
+    assert writer.flush() == 4, "spilled rows were not replayed"
+    assert not os.path.exists(writer.spill_path), "spill file left behind"
+    ids = sorted(JestitLog.objects.filter(kind=kind).values_list("model_id", flat=True))
+    assert ids == [0, 1, 2, 3], ids
+    writer.stop()
+    JestitLog.objects.filter(kind=kind).delete()
+
+
+@th.unit_test("batch_writer_replay_claims")
+def test_batch_writer_replay_claims(opts):
+    import os
+    import ujson
+    from jestit.models import JestitLog
+    kind = "batch_replay_test"
+    writer = build_writer(opts, batch_size=2, interval=60000)
+    # left behind by a process that died while replaying
+    with open(f"{writer.spill_path}.99999.1.replay", "w") as orphan:
+        orphan.write("".join(ujson.dumps(dict(kind=kind, model_id=i)) + "\n" for i in range(3)))
+    writer.spill([dict(kind=kind, model_id=i) for i in range(3, 5)])
+    write = writer.write
+    calls = []
+
+    def flaky_write(rows):
+        calls.append(len(rows))
+        if len(calls) == 2:
+            raise RuntimeError("database unavailable")
+        write(rows)
+
+    writer.write = flaky_write
+    # the spill file is claimed, the first chunk is written and the rest is spilled again
+    written = writer.replay()
+    assert all(size <= 2 for size in calls), f"replay was not chunked {calls}"
+    assert JestitLog.objects.filter(kind=kind).count() == written, "written rows miscounted"
+    writer.write = write
+    written += writer.replay()
+    assert written == 5, f"expected every spilled row once, got {written}"
+    ids = sorted(JestitLog.objects.filter(kind=kind).values_list("model_id", flat=True))
+    assert ids == list(range(5)), ids
+    folder = os.path.dirname(writer.spill_path)
+    assert not os.listdir(folder), f"spill files left behind {os.listdir(folder)}"
+    writer.stop()
+    JestitLog.objects.filter(kind=kind).delete()
+
+
+@th.unit_test("jestit_log_record")
+def test_jestit_log_record(opts):
+    th.setup_django()
+    from django.test import RequestFactory
+    from django.contrib.auth.models import AnonymousUser
+    from jestit.models import JestitLog
+    from jestit.helpers import batchwriter
+    request = RequestFactory().get("/api/example/todo", REMOTE_ADDR="10.1.2.3")
+    request.user = AnonymousUser()
+    before = JestitLog.objects.filter(kind="record_test").count()
+    JestitLog.record("record_test", "listed todos", request=request, model_name="example.TODO", model_id=7)
+    batchwriter.get_writer(JestitLog).flush()
+    row = JestitLog.objects.filter(kind="record_test").last()
+    assert JestitLog.objects.filter(kind="record_test").count() == before + 1, "row was not written"
+    assert (row.path, row.ip, row.uid, row.model_id) == ("/api/example/todo", "10.1.2.3", 0, 7), row.__dict__
+    assert row.created is not None
+    JestitLog.objects.filter(kind="record_test").delete()
+
+
+@th.unit_test("jestit_log_archive")
+def test_jestit_log_archive(opts):
+    import os
+    import datetime
+    import tempfile
+    th.setup_django()
+    from django.utils import timezone
+    from jestit.models import JestitLog
+    from jestit.helpers import retention
+    kind = "archive_test"
+    now = timezone.now()
+    JestitLog.objects.filter(created__lt=now - datetime.timedelta(days=30)).delete()
+    JestitLog.objects.bulk_create(
+        [JestitLog(kind=kind, model_id=i, created=now - datetime.timedelta(days=40 + i % 3)) for i in range(25)]
+        + [JestitLog(kind=kind, model_id=100, created=now)])
+    folder = tempfile.mkdtemp()
+    assert retention.archive_rows(JestitLog, now - datetime.timedelta(days=30), folder, batch_size=10) == 25
+    assert list(JestitLog.objects.filter(kind=kind).values_list("model_id", flat=True)) == [100], "recent row archived"
+    files = sorted(os.listdir(folder))
+    assert len(files) == 3, f"expected one archive per day, got {files}"
+    rows = [row for name in files for row in retention.read_archive(os.path.join(folder, name))]
+    assert sorted(row["model_id"] for row in rows) == list(range(25)), "archive is missing rows"
+    assert JestitLog.archive(days=30, folder=folder) == 0, "second run should have nothing to archive"
+    JestitLog.objects.filter(kind=kind).delete()
@@ -0,0 +1,180 @@
+from testit import helpers as th
+
+
+class CountingArg:
+    def __init__(self):
+        self.calls = 0
+
+    def __str__(self):
+        self.calls += 1
+        return "counted"
+
+
+def build_queue_logger(name, maxsize, policy):
+    import io
+    import queue
+    import logging
+    from jestit.helpers import logit
+    stream = io.StringIO()
+    target = logging.StreamHandler(stream)
+    target.setFormatter(logging.Formatter("%(levelname)s %(message)s"))
+    log_queue = queue.Queue(maxsize)
+    handler = logit.LogQueueHandler(log_queue, [target], policy)
+    logger = logging.getLogger(name)
+    logger.handlers = [handler]
+    logger.propagate = False
+    logger.setLevel(logging.INFO)
+    return logit.Logger(name, None, logger), handler, logit.LogQueueListener(log_queue), stream
+
+
+@th.unit_test("logit_lazy_format")
+def test_logit_lazy_format(opts):
+    from jestit.helpers import logit
+    logger, handler, listener, stream = build_queue_logger("logit_lazy_test", 10, logit.QUEUE_DROP)
+    arg = CountingArg()
+    logger.debug("skipped", arg)
+    logger.info("queued", arg)
+    assert arg.calls == 0, "message formatted on the calling thread"
+    listener.start()
+    listener.stop()
+    assert arg.calls == 1, f"expected one format, got {arg.calls}"
+    assert stream.getvalue() == "INFO queued\ncounted\n", stream.getvalue()
+
+
+@th.unit_test("logit_queue_drop_policy")
+def test_logit_queue_drop_policy(opts):
+    from jestit.helpers import logit
+    logger, handler, listener, stream = build_queue_logger("logit_drop_test", 2, logit.QUEUE_DROP)
+    data = dict(step=1)
+    logger.info("first", data)
+    data["step"] = 2
+    logger.info("second")
+    logger.info("third")
+    assert handler.dropped == 1, f"expected 1 dropped, got {handler.dropped}"
+    listener.start()
+    listener.stop()
+    output = stream.getvalue()
+    assert "third" not in output, "full queue accepted a record"
+    assert '"step"\x1b[0m: \x1b[33m1' in output, "logged dict changed after the call"
+    logger.info("fourth")
+    listener.start()
+    listener.stop()
+    assert "dropped 1 records" in stream.getvalue(), "drops were not reported"
+
+    logger, handler, listener, stream = build_queue_logger("logit_oldest_test", 2, logit.QUEUE_DROP_OLDEST)
+    for name in ["first", "second", "third"]:
+        logger.info(name)
+    listener.start()
+    listener.stop()
+    assert stream.getvalue() == "INFO second\nINFO third\n", stream.getvalue()
+
+
+@th.unit_test("logit_rotation_compress")
+def test_logit_rotation_compress(opts):
+    import os
+    import gzip
+    import time
+    import logging
+    import tempfile
+    from jestit.helpers import logit
+    folder = tempfile.mkdtemp()
+    path = os.path.join(folder, "rotate.log")
+    handler = logit.LogFileHandler(path, max_bytes=200, backup_count=2, interval=3600)
+    handler.setFormatter(logging.Formatter("%(message)s"))
+    logger = logging.getLogger("logit_rotate_test")
+    logger.handlers = [handler]
+    logger.propagate = False
+    logger.setLevel(logging.INFO)
+    for i in range(30):
+        logger.info(f"line {i:02d} " + "x" * 40)
+    handler.close()
+    files = sorted(os.listdir(folder))
+    assert files == ["rotate.log", "rotate.log.1.gz", "rotate.log.2.gz"], files
+    with gzip.open(f"{path}.1.gz", "rt") as src:
+        rotated = src.read().splitlines()
+    with open(path) as src:
+        current = src.read().splitlines()
+    assert int(rotated[-1][5:7]) + 1 == int(current[0][5:7]), "rotated segment out of order"
+
+    # the interval boundary rolls a small file
+    handler.rollover_at = time.time() - 1
+    logger.info("next interval")
+    handler.close()
+    with open(path) as src:
+        assert src.read() == "next interval\n", "interval did not roll the file"
+    assert handler.rollover_at > time.time(), "next rollover not scheduled"
+
+
+@th.unit_test("logit_shared_file_handler")
+def test_logit_shared_file_handler(opts):
+    from jestit.helpers import logit
+    first = logit.get_logger("logit_shared_a", "logit_shared.log")
+    second = logit.get_logger("logit_shared_b", "logit_shared.log")
+    handlers = [h for h in first.logger.handlers + second.logger.handlers if isinstance(h, logit.LogFileHandler)]
+    if not handlers:
+        # queue mode, the file handler sits behind the queue handler
+        handlers = [target for h in first.logger.handlers + second.logger.handlers for target in h.targets]
+    assert len(handlers) == 2 and handlers[0] is handlers[1], "loggers of one file should share a handler"
+
+
+@th.unit_test("logit_json_lines")
+def test_logit_json_lines(opts):
+    import io
+    import ujson
+    import logging
+    from decimal import Decimal
+    from objict import objict
+    from jestit.helpers import logit, context
+    stream = io.StringIO()
+    target = logging.StreamHandler(stream)
+    target.setFormatter(logit.JsonFormatter())
+    logger = logging.getLogger("logit_json_test")
+    logger.handlers = [target]
+    logger.propagate = False
+    logger.setLevel(logging.INFO)
+    log = logit.Logger("logit_json_test", None, logger, structured=True)
+
+    request = objict(META={"HTTP_X_REQUEST_ID": "req-1"})
+    token = context.set_request(request)
+    try:
+        log.info("GET", "/api/example/todo", dict(size=10, total=Decimal("1.5")))
+    finally:
+        context.reset_request(token)
+    log.warning("outside")
+    try:
+        raise ValueError("boom")
+    except ValueError:
+        log.exception("failed")
+    lines = [ujson.loads(line) for line in stream.getvalue().splitlines()]
+    assert len(lines) == 3, f"expected one line per record, got {len(lines)}"
+    first = lines[0]
+    assert first["logger"] == "logit_json_test" and first["level"] == "INFO", first
+    assert first["request_id"] == "req-1", "request id not captured"
+    assert first["msg"] == "GET /api/example/todo", first["msg"]
+    assert first["fields"] == dict(size=10, total=1.5), first["fields"]
+    assert first["timestamp"].endswith("+00:00"), first["timestamp"]
+    assert "request_id" not in lines[1], "request id outside a request"
+    assert "ValueError: boom" in lines[2]["exc"], "missing traceback"
+
+
+@th.unit_test("logit_sampling")
+def test_logit_sampling(opts):
+    import io
+    import random
+    import logging
+    from jestit.helpers import logit
+    stream = io.StringIO()
+    target = logging.StreamHandler(stream)
+    target.setFormatter(logging.Formatter("%(levelname)s"))
+    logger = logging.getLogger("logit_sample_test")
+    logger.handlers = [target]
+    logger.propagate = False
+    logger.setLevel(logging.INFO)
+    log = logit.Logger("logit_sample_test", None, logger, sample_rate=0.1)
+    random.seed(7)
+    for _ in range(1000):
+        log.info("hot path")
+    log.error("always kept")
+    lines = stream.getvalue().splitlines()
+    assert lines[-1] == "ERROR", "errors must not be sampled"
+    assert 50 < len(lines) - 1 < 150, f"expected about 100 sampled records, got {len(lines) - 1}"
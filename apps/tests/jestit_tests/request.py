@@ -0,0 +1,62 @@
+from testit import helpers as th
+
+
+@th.unit_test("request_data_is_lazy")
+def test_request_data_is_lazy(opts):
+    th.setup_django()
+    from django.test import RequestFactory
+    from jestit.helpers.request import lazy_request_data
+    request = RequestFactory().post("/api/example/todo?kind=lazy", dict(name="todo"), content_type="application/json")
+    request.DATA = lazy_request_data(request)
+    assert not hasattr(request, "_body"), "body read before DATA was used"
+    assert request.DATA.name == "todo", "json body not parsed"
+    assert request.DATA.get("kind") == "lazy", "query string not merged"
+    assert isinstance(request.DATA, dict)
+
+
+@th.unit_test("request_data_keeps_uploads")
+def test_request_data_keeps_uploads(opts):
+    th.setup_django()
+    from django.core.files.uploadedfile import SimpleUploadedFile, UploadedFile
+    from django.test import RequestFactory
+    from jestit.helpers.request import lazy_request_data
+    upload = SimpleUploadedFile("data.csv", b"a,b\n1,2\n", content_type="text/csv")
+    request = RequestFactory().post("/api/example/todo", dict(name="todo", data=upload))
+    request.DATA = lazy_request_data(request)
+    assert request.DATA.name == "todo", "form field not parsed"
+    handle = request.DATA.files["data"]
+    assert isinstance(handle, UploadedFile), f"upload was not kept as a file handle {type(handle)}"
+    assert handle.read() == b"a,b\n1,2\n"
+
+
+@th.unit_test("active_request_context")
+def test_active_request_context(opts):
+    th.setup_django()
+    import threading
+    from jestit.helpers import context
+    from jestit.models import base
+    seen = {}
+
+    def handle(name):
+        token = context.set_request(name)
+        barrier.wait()
+        seen[name] = context.get_request()
+        context.reset_request(token)
+
+    barrier = threading.Barrier(2)
+    threads = [threading.Thread(target=handle, args=(name,)) for name in ("first", "second")]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert seen == dict(first="first", second="second"), f"requests leaked across threads {seen}"
+
+    token = context.set_request("outer")
+    try:
+        with context.ContextThreadPoolExecutor(max_workers=2) as executor:
+            results = list(executor.map(lambda _: context.get_request(), range(4)))
+        assert results == ["outer"] * 4, f"request not propagated into executor {results}"
+        assert base.ACTIVE_REQUEST == "outer"
+    finally:
+        context.reset_request(token)
+    assert context.get_request() is None
@@ -0,0 +1,36 @@
+from testit import helpers as th
+
+
+def build_router():
+    th.setup_django()
+    from jestit.helpers.router import Router
+    router = Router("tests")
+    router.add("user", "ALL", "user_list", "user_list")
+    router.add("user/<int:pk>", "GET", "user_get", "user_get")
+    router.add("user/<int:pk>", "POST", "user_save", "user_save")
+    router.add("user/me", "ALL", "user_me", "user_me")
+    router.add("file/<path:name>", "ALL", "file", "file")
+    router.add(r"^legacy/(?P<slug>[a-z]+)$", "ALL", "legacy", "legacy")
+    return router
+
+
+@th.unit_test("router_resolves_segments")
+def test_router_resolves_segments(opts):
+    router = build_router()
+    assert router.resolve("GET", "user")[0] == "user_list"
+    assert router.resolve("GET", "user/5") == ("user_get", "user_get", dict(pk=5))
+    assert router.resolve("POST", "user/5")[0] == "user_save", "method specific handler not used"
+    assert router.resolve("GET", "user/me")[0] == "user_me", "static segment should win over a param"
+    assert router.resolve("GET", "user/abc") is None, "int converter accepted text"
+    assert router.resolve("GET", "user/5/extra") is None
+    assert router.resolve("GET", "missing") is None
+
+
+@th.unit_test("router_fallback_patterns")
+def test_router_fallback_patterns(opts):
+    router = build_router()
+    assert router.resolve("GET", "file/a/b.txt") == ("file", "file", dict(name="a/b.txt"))
+    assert router.resolve("GET", "legacy/abc") == ("legacy", "legacy", dict(slug="abc"))
+    assert router.resolve("GET", "legacy/ABC") is None
+    # a method without its own handler falls back to the first one registered
+    assert router.resolve("DELETE", "user/5")[0] == "user_get"
@@ -0,0 +1,73 @@
+from testit import helpers as th
+
+
+@th.unit_test("timing_histogram")
+def test_timing_histogram(opts):
+    th.setup_django()
+    from jestit.helpers.timing import Histogram
+    histogram = Histogram((1, 10, 100))
+    for value in [0.5, 2, 3, 4, 5, 6, 7, 8, 9, 250]:
+        histogram.observe(value)
+    assert histogram.count == 10 and histogram.max == 250
+    assert histogram.counts == [1, 8, 0, 1], histogram.counts
+    assert histogram.percentile(50) == 10, histogram.percentile(50)
+    assert histogram.percentile(99) == 250, "overflow bucket should report the max"
+    assert Histogram((1,)).percentile(50) is None
+
+
+@th.unit_test("timing_middleware")
+def test_timing_middleware(opts):
+    import re
+    th.setup_django()
+    from django.db import connection
+    from django.test import Client
+    from django.test.utils import CaptureQueriesContext
+    from jestit.decorators import http as jd
+    from jestit.helpers import timing
+    key = next(key for key in jd.URLPATTERN_METHODS if key.endswith("__todo__ALL"))
+    before = timing.get_stats().get(key, {}).get("total_ms", {}).get("count", 0)
+    client = Client(SERVER_NAME="localhost")
+    with CaptureQueriesContext(connection) as ctx:
+        resp = client.get("/api/example/todo", dict(size=5))
+    assert resp.status_code == 200, f"Expected status_code is 200 but got {resp.status_code}"
+    header = resp.headers.get("Server-Timing")
+    assert header is not None, "missing Server-Timing header"
+    match = re.search(r'db;dur=[\d.]+;desc="(\d+) queries"', header)
+    assert match is not None, header
+    assert int(match.group(1)) == len(ctx.captured_queries), f"{header} vs {len(ctx.captured_queries)} queries"
+    assert re.search(r"serialize;dur=[\d.]+", header), header
+
+    stats = timing.get_stats()[key]
+    assert stats["total_ms"]["count"] == before + 1, "request not aggregated under its route key"
+    assert stats["size"]["max"] >= len(resp.content), "response size not recorded"
+    assert timing.get_timer() is None, "timer still active after the request"
+
+
+@th.unit_test("timing_concurrent_async")
+def test_timing_concurrent_async(opts):
+    import asyncio
+    th.setup_django()
+    from asgiref.sync import sync_to_async
+    from django.db import connection
+    from jestit.helpers import timing
+
+    def run_queries(count):
+        timing.install_query_tracking(connection)
+        for _ in range(count):
+            with connection.cursor() as cursor:
+                cursor.execute("SELECT 1")
+
+    async def fake_request(count):
+        # like the ASGI middleware, every task has its own timer in its own context
+        timer = timing.RequestTimer()
+        timing.ACTIVE_TIMER.set(timer)
+        for _ in range(count):
+            await sync_to_async(run_queries)(1)
+            await asyncio.sleep(0)
+        return timer
+
+    async def main():
+        return await asyncio.gather(fake_request(2), fake_request(5), fake_request(9))
+
+    timers = asyncio.run(main())
+    assert [timer.queries for timer in timers] == [2, 5, 9], [timer.queries for timer in timers]
@@ -0,0 +1,25 @@
+#!/usr/bin/env python
+"""
+Archives JestitLog rows past the retention window to VAR_ROOT/archive and deletes them,
+meant to run daily from cron.
+
+    ./bin/archive_logs.py --days 90
+"""
+import argparse
+import paths
+
+paths.init_django()
+
+from jestit.models import JestitLog
+
+
+def main():
+    parser = argparse.ArgumentParser(description="archive old JestitLog rows")
+    parser.add_argument("-d", "--days", type=int, default=None, help="days to keep (JESTIT_LOG_RETENTION_DAYS)")
+    parser.add_argument("-f", "--folder", default=None, help="archive folder")
+    opts = parser.parse_args()
+    print(f"archived {JestitLog.archive(opts.days, opts.folder)} rows")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,14 @@
+"""
+ASGI entry point, coroutine views run natively in the server event loop.
+
+    uvicorn asgi:application --app-dir bin
+"""
+import os
+import paths
+
+paths.load_apps()
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'project')
+
+from django.core.asgi import get_asgi_application
+
+application = get_asgi_application()
@@ -0,0 +1,77 @@
+#!/usr/bin/env python
+"""
+Micro-benchmark for permission checks.
+
+Compares the original recursive JSON dict lookups against the compiled
+RestMeta permission sets on an in-memory User (no database access), checking
+each model's RestMeta perms the way `rest_check_permission` does.
+
+    ./bin/bench_perms.py -n 1000000
+"""
+import argparse
+import time
+import paths
+
+paths.init_django()
+
+from authit.models import User, Group, GroupMember
+from example.models import Note
+from jestit.helpers import perms as jperms
+
+PERM_KEYS = ["SAVE_PERMS", "VIEW_PERMS"]
+
+
+def legacy_has_permission(permissions, perm_key):
+    if isinstance(perm_key, list):
+        for pk in perm_key:
+            if legacy_has_permission(permissions, pk):
+                return True
+        return False
+    if perm_key == "all":
+        return True
+    return permissions.get(perm_key, False)
+
+
+def legacy_check(model, user):
+    perms = model.get_rest_meta_prop(PERM_KEYS, [])
+    if perms is None or len(perms) == 0:
+        return True
+    return legacy_has_permission(user.permissions, perms)
+
+
+def compiled_check(model, user):
+    perms = model.get_rest_perms(jperms.SAVE_KEYS)
+    if not perms:
+        return True
+    return user.has_permission(perms)
+
+
+def bench(label, check, models, user, count):
+    started = time.perf_counter()
+    for i in range(count):
+        check(models[i % len(models)], user)
+    duration = time.perf_counter() - started
+    print(f"{label.ljust(10)} {duration * 1000:10.2f}ms  ({count / duration:,.0f} checks/s)")
+    return duration
+
+
+def main():
+    parser = argparse.ArgumentParser(description="permission check micro-benchmark")
+    parser.add_argument("-n", "--checks", type=int, default=1000000)
+    parser.add_argument("-p", "--perms", type=int, default=20, help="extra permissions on the user")
+    opts = parser.parse_args()
+
+    permissions = {f"perm_{i}": True for i in range(opts.perms)}
+    permissions["save_notes"] = True
+    models = [User, Group, GroupMember, Note]
+    # a user granted on one model (Note) and denied on the rest, which walks every perm
+    user = User(id=1, username="bench", email="bench@example.com", permissions=permissions)
+    for model in models:
+        assert bool(legacy_check(model, user)) == compiled_check(model, user), f"{model.__name__} differs"
+    legacy = bench("legacy", legacy_check, models, user, opts.checks)
+    compiled = bench("compiled", compiled_check, models, user, opts.checks)
+    print(f"speedup    {legacy / compiled:10.2f}x")
+
+
+if __name__ == "__main__":
+    main()
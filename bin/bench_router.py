@@ -0,0 +1,65 @@
+#!/usr/bin/env python
+"""
+Micro-benchmark for route resolution.
+
+Registers 500 routes (250 list + 250 detail patterns) and resolves paths spread
+across them with a flat list of Django url patterns (how routes used to be
+registered) and with the jestit app Router.
+
+    ./bin/bench_router.py -r 500 -n 100000
+"""
+import argparse
+import random
+import time
+import paths
+
+paths.init_django()
+
+from django.urls import path
+from django.urls.resolvers import URLResolver, RegexPattern
+from jestit.helpers.router import Router
+
+
+def view(request, **kwargs):
+    return None
+
+
+def build(count):
+    patterns, router, lookups = [], Router("bench"), []
+    for i in range(count // 2):
+        for pattern in (f"model{i}", f"model{i}/<int:pk>"):
+            patterns.append(path(pattern, view, kwargs={"__jestit_key__": pattern}))
+            router.add(pattern, "ALL", pattern, view)
+        lookups.append(f"model{i}")
+        lookups.append(f"model{i}/{i + 1}")
+    resolver = URLResolver(RegexPattern(r"^"), patterns)
+    return resolver, router, lookups
+
+
+def bench(label, resolve, lookups, count):
+    started = time.perf_counter()
+    for i in range(count):
+        resolve(lookups[i % len(lookups)])
+    duration = time.perf_counter() - started
+    print(f"{label.ljust(10)} {duration * 1000:10.2f}ms  ({count / duration:,.0f} lookups/s)")
+    return duration
+
+
+def main():
+    parser = argparse.ArgumentParser(description="route resolution micro-benchmark")
+    parser.add_argument("-r", "--routes", type=int, default=500)
+    parser.add_argument("-n", "--lookups", type=int, default=100000)
+    opts = parser.parse_args()
+
+    resolver, router, lookups = build(opts.routes)
+    random.shuffle(lookups)
+    for lookup in lookups[:20]:
+        match = resolver.resolve(lookup)
+        assert router.resolve("GET", lookup)[2] == {k: v for k, v in match.kwargs.items() if k == "pk"}
+    flat = bench("flat", resolver.resolve, lookups, opts.lookups)
+    routed = bench("router", lambda lookup: router.resolve("GET", lookup), lookups, opts.lookups)
+    print(f"speedup    {flat / routed:10.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,106 @@
+#!/usr/bin/env python
+"""
+Micro-benchmark for GraphSerializer.
+
+Compares the compiled graph plans against the original per-row RestMeta lookup
+on in-memory TODO rows (no database access), using the "default" graph which
+includes the nested note graph.
+
+    ./bin/bench_serializer.py -n 10000
+"""
+import argparse
+import datetime
+import time
+import paths
+
+paths.init_django()
+
+from django.db.models import ForeignKey, OneToOneField
+from jestit.serializers.models import GraphSerializer
+from example.models import TODO, Note
+
+
+class LegacyGraphSerializer(GraphSerializer):
+    """
+    The pre-plan serializer, re-reading RestMeta.GRAPHS for every row.
+    """
+
+    def serialize(self):
+        if self.many:
+            return [self._serialize_instance(obj) for obj in self.instance]
+        return self._serialize_instance(self.instance)
+
+    def _serialize_instance(self, obj):
+        graph_config = obj.RestMeta.GRAPHS.get(self.graph)
+        if graph_config is None and self.graph != "default":
+            self.graph = "default"
+            graph_config = obj.RestMeta.GRAPHS.get(self.graph)
+        data = self._model_to_dict_custom(obj, fields=graph_config.get("fields", None))
+        for field in graph_config.get("extra", []):
+            method_name, alias = field if isinstance(field, tuple) else (field, field)
+            if hasattr(obj, method_name):
+                attr = getattr(obj, method_name)
+                data[alias] = attr() if callable(attr) else attr
+        for related_field, sub_graph in graph_config.get("graphs", {}).items():
+            related_obj = getattr(obj, related_field, None)
+            if related_obj is not None:
+                field_obj = obj._meta.get_field(related_field)
+                if isinstance(field_obj, (ForeignKey, OneToOneField)):
+                    data[related_field] = LegacyGraphSerializer(related_obj, graph=sub_graph).serialize()
+        return data
+
+    def _model_to_dict_custom(self, obj, fields=None):
+        data = {}
+        for field in obj._meta.fields:
+            if fields and field.name not in fields:
+                continue
+            field_value = getattr(obj, field.name)
+            if isinstance(field_value, datetime.datetime):
+                data[field.name] = int(field_value.timestamp())
+            elif field_value is not None and isinstance(field, (ForeignKey, OneToOneField)):
+                data[field.name] = field_value.id
+            else:
+                data[field.name] = field_value
+        return data
+
+
+def build_rows(count):
+    now = datetime.datetime.now(datetime.timezone.utc)
+    notes = [Note(id=i + 1, name=f"note {i}", kind="ticket", description="bench", created=now, modified=now)
+             for i in range(max(1, count // 10))]
+    rows = []
+    for i in range(count):
+        todo = TODO(id=i + 1, name=f"todo {i}", kind="ticket", description="bench", created=now, modified=now)
+        todo.note = notes[i % len(notes)]
+        rows.append(todo)
+    return rows
+
+
+def bench(label, serializer_class, rows, graph, rounds):
+    best = None
+    for _ in range(rounds):
+        started = time.perf_counter()
+        serializer_class(rows, graph=graph, many=True).serialize()
+        duration = time.perf_counter() - started
+        best = duration if best is None else min(best, duration)
+    print(f"{label.ljust(10)} {best * 1000:10.2f}ms  ({len(rows) / best:,.0f} rows/s)")
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description="GraphSerializer micro-benchmark")
+    parser.add_argument("-n", "--rows", type=int, default=10000)
+    parser.add_argument("-r", "--rounds", type=int, default=5)
+    parser.add_argument("-g", "--graph", type=str, default="default")
+    opts = parser.parse_args()
+
+    rows = build_rows(opts.rows)
+    assert LegacyGraphSerializer(rows[:5], graph=opts.graph, many=True).serialize() == \
+        GraphSerializer(rows[:5], graph=opts.graph, many=True).serialize(), "plan output differs"
+    legacy = bench("legacy", LegacyGraphSerializer, rows, opts.graph, opts.rounds)
+    planned = bench("plan", GraphSerializer, rows, opts.graph, opts.rounds)
+    print(f"speedup    {legacy / planned:10.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -26,10 +26,14 @@ ALLOWED_HOSTS = ["localhost", "127.0.0.1"]
 
 APPEND_SLASH = False
 
+# allow bulk JSON list bodies (ie 50k row imports) past the 2.5MB django default
+DATA_UPLOAD_MAX_MEMORY_SIZE = 20 * 1024 * 1024
+
 # ---------------------------------------------------------------------
 # MIDDLEWARE
 # ---------------------------------------------------------------------
 MIDDLEWARE = [
+    'jestit.middleware.timing.RequestTimingMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',